@@ -1,5 +1,5 @@
 from .model import test, DUT, TestSpec, BoundTest, TestResult
 from .streaming import StreamSink, TCPSink, NullSink, StreamMux
-from .iperf import run_iperf_host_dut, run_iperf_mesh
+from .iperf import run_iperf_host_dut, run_iperf_mesh, run_iperf_mesh_async
 from .transport import LocalTransport, SSHTransport, ProcOutput
 from .uart import UartSpec, UartTap
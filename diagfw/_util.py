@@ -0,0 +1,42 @@
+"""Small internal helpers shared across diagfw modules."""
+from __future__ import annotations
+from typing import Optional, Dict, Any
+import os, select, sys
+
+try:
+    import orjson  # optional, much faster than stdlib json
+except ImportError:
+    orjson = None
+
+try:
+    import liburing  # optional, io_uring for collector writes and UART reads (Linux 5.6+)
+except ImportError:
+    liburing = None
+
+# __slots__ dataclasses need 3.10+; older interpreters keep a per-instance __dict__.
+_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+def _write_all(fd: int, data) -> None:
+    """os.write() until all of `data` is written (os.write may write only part)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _uring_wait_cqe(ring, cqe, stop_fd: Optional[int] = None) -> bool:
+    """Wait for the next completion on `ring` and peek it into `cqe`. Returns False instead
+    if `stop_fd` becomes readable first (checked before each completion).
+
+    The liburing bindings hold the GIL while they block in io_uring_enter
+    (io_uring_submit_and_wait, io_uring_wait_cqe), which would stall every other thread.
+    So this sleeps in select() on the ring fd, which turns readable once a completion is
+    posted, and reaps with the non-blocking io_uring_peek_cqe."""
+    rlist = [ring.ring_fd] if stop_fd is None else [ring.ring_fd, stop_fd]
+    while True:
+        if stop_fd is not None and stop_fd in select.select(rlist, [], [])[0]:
+            return False
+        try:
+            liburing.io_uring_peek_cqe(ring, cqe)
+            return True
+        except BlockingIOError:
+            if stop_fd is None:
+                select.select(rlist, [], [])
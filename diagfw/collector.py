@@ -6,9 +6,13 @@ def main():
     ap = argparse.ArgumentParser(description="diagfw NDJSON collector")
     ap.add_argument("--host", default="0.0.0.0")
     ap.add_argument("--port", type=int, default=9901)
+    ap.add_argument("--io-uring", action="store_true",
+                    help="batch file writes through io_uring (Linux, needs liburing)")
     args = ap.parse_args()
     print(f"[collector] listening on {args.host}:{args.port}, writing to ./streams/")
     srv = ThreadingTCPServer((args.host, args.port), NDJSONHandler)
+    if args.io_uring:
+        srv.use_io_uring = True
     try:
         srv.serve_forever()
     except KeyboardInterrupt:
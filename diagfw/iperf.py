@@ -1,9 +1,9 @@
 from __future__ import annotations
 from typing import Optional, List, Dict, Any
-import threading, time, pathlib
+import asyncio, threading, pathlib, contextlib, subprocess
 
 from .model import test, DUT, TestResult
-from .transport import Transport, LocalTransport
+from .transport import Transport, LocalTransport, ProcOutput
 from .streaming import StreamMux, StreamSink
 
 def _run_and_store(transport: Transport, cmd: str, container: dict, timeout: int|None=None):
@@ -13,6 +13,14 @@ def _run_and_store(transport: Transport, cmd: str, container: dict, timeout: int
 def _dut_ip(dut: DUT) -> str:
     return str(dut.meta.get("iperf_ip") or dut.meta.get("ip") or dut.host)
 
+def _wait_port_cmd(port: int, deadline: float = 0.5) -> str:
+    """Shell loop run next to the server: exits 0 as soon as something LISTENs on `port`,
+    polling every ~10 ms for roughly `deadline` seconds. It checks socket state instead of
+    connecting because `iperf3 -s -1` would take a probe connection as its one client."""
+    tries = max(1, int(deadline / 0.015))
+    return (f"for _ in $(seq {tries}); do ss -ltn 'sport = :{port}' 2>/dev/null | grep -q LISTEN"
+            f" && exit 0; sleep 0.01; done; exit 1")
+
 def run_iperf_host_dut(
     dut: DUT,
     server_ip_for_dut: str,
@@ -30,7 +38,9 @@ def run_iperf_host_dut(
     server_th = threading.Thread(
         target=_run_and_store, args=(t_local, server_cmd, server_box, duration+30), daemon=True
     )
-    server_th.start(); time.sleep(0.4)
+    server_th.start()
+    with contextlib.suppress(subprocess.TimeoutExpired):  # a failed probe just proceeds
+        t_local.run(_wait_port_cmd(port), timeout=2)
 
     # client on DUT
     spec = (
@@ -58,69 +68,119 @@ def run_iperf_host_dut(
             "path": str(srv_json_path), "exists": True, "preview": content[:2000]
         }
         mux = StreamMux(stream_sink, res.run_id, res.test_name, dut)
-        for ln in content.splitlines(True):
-            mux.emit_text("host_iperf_server", ln)
+        mux.emit_chunked("host_iperf_server", content)
+        mux.flush()
     else:
         res.artifacts["host_iperf_server"] = {
             "path": str(srv_json_path), "exists": False, "error": "server thread no result"
         }
     return res
 
-def run_iperf_mesh(
+async def _run_pair(
+    server_dut: DUT,
+    client_dut: DUT,
+    *,
+    port: int,
+    duration: int,
+    parallel: int,
+    stream_sink: Optional[StreamSink],
+    host_locks: Dict[str, asyncio.Lock],
+    limit: asyncio.Semaphore,
+) -> TestResult:
+    # Pairs sharing a DUT must not overlap (the measurements would disturb each other).
+    # Lock both hosts in a fixed order. The client writes a per-pair (per-port) file because
+    # distinct hosts can still share a cwd: local DUTs, or SSH aliases of one machine. It is
+    # reported under the same "iperf_client.json" key as run_iperf_host_dut, then removed.
+    async with contextlib.AsyncExitStack() as stack:
+        for host in sorted({server_dut.host, client_dut.host}):
+            await stack.enter_async_context(host_locks[host])
+        await stack.enter_async_context(limit)
+
+        server_ip = _dut_ip(server_dut)
+        t_server = server_dut.get_transport()
+        srv_out: List[str] = []
+        srv_err: List[str] = []
+        srv_cmd = f"iperf3 -s -1 -J -p {port}"
+        srv_task = asyncio.ensure_future(t_server.stream_async(
+            srv_cmd, timeout=duration+30, on_stdout=srv_out.append, on_stderr=srv_err.append))
+        await t_server.stream_async(_wait_port_cmd(port), timeout=2)
+
+        pair_name = f"iperf-{client_dut.host}-to-{server_dut.host}"
+        client_json = f"iperf_client_{port}.json"
+        spec = (
+            test(pair_name)
+            .affects("net")
+            .cmd(f"iperf3 -c {server_ip} -p {port} -J -t {duration} -P {parallel} | tee {client_json}",
+                 timeout=duration+20)
+            .version("iperf3 --version || true")
+            .artifact(client_json)
+        )
+        res = await (spec @ client_dut).run_async(stream_sink=stream_sink)
+        await client_dut.get_transport().stream_async(f"rm -f {client_json}", timeout=5)
+        meta = res.artifacts.pop(client_json, None)
+        if meta is not None:
+            local = pathlib.Path(res.stdout_path).parent / client_json
+            if local.exists():
+                local.replace(local.with_name("iperf_client.json"))
+            res.artifacts["iperf_client.json"] = meta
+
+        await asyncio.wait({srv_task}, timeout=duration+40)
+        srv_po = None
+        if srv_task.done() and not srv_task.cancelled() and srv_task.exception() is None:
+            srv_po = ProcOutput(rc=srv_task.result(), stdout="".join(srv_out), stderr="".join(srv_err))
+        else:
+            srv_task.cancel()
+        out_dir = pathlib.Path(res.stdout_path).parent
+        srv_json_path = out_dir / "iperf_server.json"
+        if srv_po:
+            content = (srv_po.stdout or srv_po.stderr or "")
+            srv_json_path.write_text(content, encoding="utf-8", errors="replace")
+            res.artifacts["server_iperf"] = {
+                "path": str(srv_json_path), "exists": True, "server": server_dut.host,
+                "preview": content[:2000]
+            }
+            mux = StreamMux(stream_sink, res.run_id, res.test_name, client_dut)
+            mux.emit_chunked("server_iperf", content, meta={"server": server_dut.host})
+            mux.flush()
+        else:
+            res.artifacts["server_iperf"] = {
+                "path": str(srv_json_path), "exists": False, "server": server_dut.host,
+                "error": "server no result"
+            }
+        return res
+
+async def run_iperf_mesh_async(
     duts: List[DUT],
     *,
     port: int = 5201,
     duration: int = 5,
     parallel: int = 1,
     stream_sink: Optional[StreamSink] = None,
+    max_workers: Optional[int] = None,
 ) -> List[TestResult]:
-    results: List[TestResult] = []
-
-    for i in range(len(duts)):
-        for j in range(i+1, len(duts)):
-            server_dut = duts[i]
-            client_dut = duts[j]
-            server_ip = _dut_ip(server_dut)
-
-            t_server = server_dut.get_transport()
-            srv_box = {}
-            srv_cmd = f"iperf3 -s -1 -J -p {port}"
-            srv_th = threading.Thread(
-                target=_run_and_store, args=(t_server, srv_cmd, srv_box, duration+30), daemon=True
-            )
-            srv_th.start(); time.sleep(0.5)
-
-            pair_name = f"iperf-{client_dut.host}-to-{server_dut.host}"
-            spec = (
-                test(pair_name)
-                .affects("net")
-                .cmd(f"iperf3 -c {server_ip} -p {port} -J -t {duration} -P {parallel} | tee iperf_client.json",
-                     timeout=duration+20)
-                .version("iperf3 --version || true")
-                .artifact("iperf_client.json")
-            )
-            res = (spec @ client_dut).run(stream_sink=stream_sink)
+    """Run iperf between every DUT pair on the running event loop. Pairs on disjoint DUTs
+    run concurrently, each on its own port (port, port+1, ...); at most `max_workers`
+    pairs (default 16) are in flight. Results are returned in pair order."""
+    pairs = [(i, j) for i in range(len(duts)) for j in range(i+1, len(duts))]
+    host_locks = {d.host: asyncio.Lock() for d in duts}
+    limit = asyncio.Semaphore(max_workers or 16)
+    return list(await asyncio.gather(*[
+        _run_pair(duts[i], duts[j], port=port+k, duration=duration, parallel=parallel,
+                  stream_sink=stream_sink, host_locks=host_locks, limit=limit)
+        for k, (i, j) in enumerate(pairs)
+    ]))
 
-            srv_th.join(timeout=duration+40)
-            out_dir = pathlib.Path(res.stdout_path).parent
-            srv_json_path = out_dir / "iperf_server.json"
-            srv_po = srv_box.get("result")
-            if srv_po:
-                content = (srv_po.stdout or srv_po.stderr or "")
-                srv_json_path.write_text(content, encoding="utf-8", errors="replace")
-                res.artifacts["server_iperf"] = {
-                    "path": str(srv_json_path), "exists": True, "server": server_dut.host,
-                    "preview": content[:2000]
-                }
-                mux = StreamMux(stream_sink, res.run_id, res.test_name, client_dut)
-                for ln in content.splitlines(True):
-                    mux.emit_text("server_iperf", ln, meta={"server": server_dut.host})
-            else:
-                res.artifacts["server_iperf"] = {
-                    "path": str(srv_json_path), "exists": False, "server": server_dut.host,
-                    "error": "server no result"
-                }
-
-            results.append(res)
-
-    return results
+def run_iperf_mesh(
+    duts: List[DUT],
+    *,
+    port: int = 5201,
+    duration: int = 5,
+    parallel: int = 1,
+    stream_sink: Optional[StreamSink] = None,
+    max_workers: Optional[int] = None,
+) -> List[TestResult]:
+    """Blocking wrapper around run_iperf_mesh_async; from inside an event loop, await that
+    coroutine instead."""
+    return asyncio.run(run_iperf_mesh_async(
+        duts, port=port, duration=duration, parallel=parallel,
+        stream_sink=stream_sink, max_workers=max_workers))
@@ -1,14 +1,17 @@
 from __future__ import annotations
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone
-import json, uuid, pathlib
+import asyncio, json, uuid, pathlib, threading
 
 from .transport import Transport, LocalTransport, SSHTransport
-from .uart import UartSpec, UartTap
+from ._util import _SLOTS, orjson
+from .uart import UartSpec, UartTap, Durability, Backend
 from .streaming import StreamMux, StreamSink
 
-@dataclass
+_TRANSPORT_LOCK = threading.Lock()  # guards first construction of DUT._transport
+
+@dataclass(**_SLOTS)
 class CommandSpec:
     cmd: str
     stdin: Optional[str] = None
@@ -18,20 +21,36 @@ class CommandSpec:
     version_cmd: Optional[str] = None
     declared_artifacts: List[str] = field(default_factory=list)  # paths on DUT
 
-@dataclass
+@dataclass(**_SLOTS)
 class DUT:
     host: str = "localhost"
     transport: str = "local"          # "local" | "ssh"
     user: Optional[str] = None
     ssh_opts: Optional[List[str]] = None
     meta: Dict[str, Any] = field(default_factory=dict)
+    _transport: Optional[Transport] = field(default=None, init=False, repr=False, compare=False)
 
     def get_transport(self) -> Transport:
-        if self.transport == "ssh":
-            return SSHTransport(self.host, user=self.user, ssh_opts=self.ssh_opts)
-        return LocalTransport()
+        """Return this DUT's transport, built on first use and shared by later calls
+        (so e.g. every command of a run goes through one SSH ControlMaster)."""
+        t = self._transport
+        if t is None:
+            with _TRANSPORT_LOCK:
+                if self._transport is None:
+                    if self.transport == "ssh":
+                        self._transport = SSHTransport(self.host, user=self.user, ssh_opts=self.ssh_opts)
+                    else:
+                        self._transport = LocalTransport()
+                t = self._transport
+        return t
 
-@dataclass
+    def close(self) -> None:
+        """Release the cached transport (for SSH, the ControlMaster connection)."""
+        t, self._transport = self._transport, None
+        if t is not None:
+            t.close()
+
+@dataclass(**_SLOTS)
 class TestResult:
     run_id: str
     test_name: str
@@ -48,8 +67,16 @@ class TestResult:
     message: str = ""
 
     def to_json(self, **kw) -> str:
+        indent = kw.pop("indent", None)
+        if orjson is not None and not kw and indent in (None, 2):
+            try:
+                opt = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+                return orjson.dumps(self, option=opt).decode("utf-8")
+            except TypeError:
+                pass
         kw.setdefault("ensure_ascii", False)
-        return json.dumps(asdict(self), **kw)
+        # artifacts/dut already hold plain values; no need for asdict's recursive copy
+        return json.dumps({f.name: getattr(self, f.name) for f in fields(self)}, indent=indent, **kw)
 
 class TestSpec:
     """User-facing builder. Supports: test("pcie").affects(...).cmd(...).artifact(...).version(...).uart(...)."""
@@ -86,10 +113,12 @@ class TestSpec:
 
     def uart(self, port: str, *, baudrate: int = 115200, bytesize: int = 8, parity: str = "N",
              stopbits: float = 1, read_timeout: float = 0.1, encoding: str = "utf-8",
-             linger: float = 0.5, max_preview: int = 2000) -> "TestSpec":
+             linger: float = 0.5, max_preview: int = 2000,
+             durability: Durability = "periodic", backend: Backend = "default") -> "TestSpec":
         self._uart = UartSpec(port=port, baudrate=baudrate, bytesize=bytesize, parity=parity,
                               stopbits=stopbits, read_timeout=read_timeout, encoding=encoding,
-                              linger=linger, max_preview=max_preview)
+                              linger=linger, max_preview=max_preview, durability=durability,
+                              backend=backend)
         return self
 
     def _ensure_cmd(self):
@@ -101,88 +130,133 @@ class TestSpec:
             raise ValueError("Command not specified. Use .cmd('...') before binding to a DUT.")
         return BoundTest(self, dut)
 
+@dataclass
+class _RunState:
+    """Everything BoundTest sets up before the main command and tears down after it."""
+    run_id: str
+    started_at: datetime
+    transport: Transport
+    out_dir: pathlib.Path
+    stdout_file: pathlib.Path
+    stderr_file: pathlib.Path
+    mux: StreamMux
+    stdout_fp: Any = None
+    stderr_fp: Any = None
+    uart_tap: Optional[UartTap] = None
+    uart_meta: Dict[str, Any] = field(default_factory=dict)
+    version_text: Optional[str] = None
+
+    def on_out(self, line: str):
+        self.stdout_fp.write(line)
+        self.mux.emit_text("stdout", line)
+
+    def on_err(self, line: str):
+        self.stderr_fp.write(line)
+        self.mux.emit_text("stderr", line)
+
+    def close_logs(self):
+        try: self.stdout_fp.close()
+        except Exception: pass
+        try: self.stderr_fp.close()
+        except Exception: pass
+
 class BoundTest:
     def __init__(self, spec: TestSpec, dut: DUT):
         self.spec = spec
         self.dut = dut
 
     def run(self, *, artifacts_root: str = "artifacts", stream_sink: Optional[StreamSink]=None) -> TestResult:
+        st = self._begin(artifacts_root, stream_sink)
+        try:
+            rc = st.transport.stream(self.spec._cmd.cmd, **self._stream_kwargs(st))
+            status = "pass" if rc == 0 else "fail"
+        except Exception as e:
+            rc = 127
+            status = "error"
+            st.mux.emit_text("stderr", f"ERROR: {e!r}\n")
+        finally:
+            st.close_logs()
+        return self._finish(st, rc, status)
+
+    async def run_async(self, *, artifacts_root: str = "artifacts",
+                        stream_sink: Optional[StreamSink]=None) -> TestResult:
+        """Like run(), but the main command is awaited on the running event loop, so many
+        tests can stream concurrently from one thread. Blocking setup/teardown (version
+        command, UART linger, artifact reads) runs in the default executor."""
+        st = await asyncio.to_thread(self._begin, artifacts_root, stream_sink)
+        try:
+            rc = await st.transport.stream_async(self.spec._cmd.cmd, **self._stream_kwargs(st))
+            status = "pass" if rc == 0 else "fail"
+        except Exception as e:
+            rc = 127
+            status = "error"
+            st.mux.emit_text("stderr", f"ERROR: {e!r}\n")
+        finally:
+            st.close_logs()
+        return await asyncio.to_thread(self._finish, st, rc, status)
+
+    def _stream_kwargs(self, st: _RunState) -> Dict[str, Any]:
+        return dict(stdin=self.spec._cmd.stdin,
+                    timeout=self.spec._cmd.timeout,
+                    cwd=self.spec._cmd.cwd,
+                    env=self.spec._cmd.env,
+                    on_stdout=st.on_out, on_stderr=st.on_err)
+
+    def _begin(self, artifacts_root: str, stream_sink: Optional[StreamSink]) -> _RunState:
         run_id = str(uuid.uuid4())
         started_at = datetime.now(timezone.utc)
         t = self.dut.get_transport()
 
         out_dir = pathlib.Path(artifacts_root) / run_id / self.spec.name
         out_dir.mkdir(parents=True, exist_ok=True)
-        stdout_file = out_dir / "stdout.log"
-        stderr_file = out_dir / "stderr.log"
-
-        mux = StreamMux(stream_sink, run_id, self.spec.name, self.dut)
+        st = _RunState(run_id=run_id, started_at=started_at, transport=t, out_dir=out_dir,
+                       stdout_file=out_dir / "stdout.log", stderr_file=out_dir / "stderr.log",
+                       mux=StreamMux(stream_sink, run_id, self.spec.name, self.dut))
+        mux = st.mux
 
         # Optional UART capture (stream + file)
-        uart_meta: Dict[str, Any] = {}
-        uart_tap: Optional[UartTap] = None
         if self.spec._uart:
             uart_path = out_dir / "uart.log"
             def _uart_emit(chunk: bytes):
                 try:
                     mux.emit_text("uart", chunk.decode(self.spec._uart.encoding, errors="replace"))
                 except Exception:
-                    from .streaming import base64
                     mux.emit_blob("uart", chunk)
             uart_tap = UartTap(self.spec._uart, uart_path, on_chunk=_uart_emit)
             if uart_tap.start():
-                uart_meta.update({
+                st.uart_tap = uart_tap
+                st.uart_meta.update({
                     "path": str(uart_path),
                     "port": self.spec._uart.port,
                     "baudrate": self.spec._uart.baudrate,
                 })
             else:
-                uart_meta.update({
+                st.uart_meta.update({
                     "path": str(uart_path),
                     "port": self.spec._uart.port,
                     "baudrate": self.spec._uart.baudrate,
                     "exists": False,
                     "error": uart_tap.error or "unknown",
                 })
-                uart_tap = None
 
         # Run version command (best‑effort)
-        version_text = None
         if self.spec._cmd.version_cmd:
             vout = t.run(self.spec._cmd.version_cmd, timeout=10)
-            version_text = (vout.stdout or vout.stderr or "").strip()
-
-        # Execute main command (streaming to files + sink)
-        stdout_fp = open(stdout_file, "w", encoding="utf-8", errors="replace")
-        stderr_fp = open(stderr_file, "w", encoding="utf-8", errors="replace")
+            st.version_text = (vout.stdout or vout.stderr or "").strip()
 
-        def on_out(line: str):
-            stdout_fp.write(line); stdout_fp.flush()
-            mux.emit_text("stdout", line)
-        def on_err(line: str):
-            stderr_fp.write(line); stderr_fp.flush()
-            mux.emit_text("stderr", line)
+        # Main command streams to files + sink
+        st.stdout_fp = open(st.stdout_file, "w", encoding="utf-8", errors="replace", buffering=65536)
+        st.stderr_fp = open(st.stderr_file, "w", encoding="utf-8", errors="replace", buffering=65536)
+        return st
 
-        try:
-            rc = t.stream(self.spec._cmd.cmd,
-                          stdin=self.spec._cmd.stdin,
-                          timeout=self.spec._cmd.timeout,
-                          cwd=self.spec._cmd.cwd,
-                          env=self.spec._cmd.env,
-                          on_stdout=on_out, on_stderr=on_err)
-            status = "pass" if rc == 0 else "fail"
-        except Exception as e:
-            rc = 127
-            status = "error"
-            mux.emit_text("stderr", f"ERROR: {e!r}\n")
-        finally:
-            try: stdout_fp.close()
-            except Exception: pass
-            try: stderr_fp.close()
-            except Exception: pass
+    def _finish(self, st: _RunState, rc: int, status: str) -> TestResult:
+        t, mux, out_dir = st.transport, st.mux, st.out_dir
+        mux.flush()
 
         # Stop UART capture (with linger)
-        if uart_tap:
+        uart_meta = st.uart_meta
+        if st.uart_tap:
+            uart_tap = st.uart_tap
             uart_tap.stop(self.spec._uart.linger)
             uart_preview = uart_tap.preview_text(self.spec._uart.max_preview, self.spec._uart.encoding)
             uart_meta.update({
@@ -194,33 +268,36 @@ class BoundTest:
         # Collect declared artifacts (best‑effort snapshot + streaming)
         artifacts_meta: Dict[str, Dict[str, Any]] = {}
         for p in self.spec._cmd.declared_artifacts:
-            content = t.read_text(p)
-            meta = {"path": p, "exists": content is not None, "preview": None}
-            if content is not None:
-                preview = content if len(content) <= 2000 else content[:2000] + "\n...<truncated>..."
-                (out_dir / pathlib.Path(p).name).write_text(content, encoding="utf-8", errors="replace")
-                meta["preview"] = preview
-                for ln in content.splitlines(True):
-                    mux.emit_text(f"artifact:{pathlib.Path(p).name}", ln)
+            name = pathlib.Path(p).name
+            dst = out_dir / name
+            size = t.read_to(p, dst, 64_000)
+            meta = {"path": p, "exists": size is not None, "preview": None}
+            if size is not None:
+                with open(dst, "rb") as f:
+                    preview = f.read(2000).decode("utf-8", errors="replace")
+                    meta["preview"] = preview if size <= 2000 else preview + "\n...<truncated>..."
+                    f.seek(0)
+                    mux.emit_file(f"artifact:{name}", f)
             artifacts_meta[p] = meta
 
         if self.spec._uart:
             artifacts_meta["uart"] = uart_meta
+        mux.flush()
 
         ended_at = datetime.now(timezone.utc)
         msg = f"'%s' rc=%s; affects=%s; cmd=%r" % (self.spec.name, rc, self.spec._affects, self.spec._cmd.cmd)
 
         return TestResult(
-            run_id=run_id,
+            run_id=st.run_id,
             test_name=self.spec.name,
             affects=self.spec._affects,
-            started_at=started_at.isoformat(),
+            started_at=st.started_at.isoformat(),
             ended_at=ended_at.isoformat(),
             rc=rc,
             status=status,
-            stdout_path=str(stdout_file),
-            stderr_path=str(stderr_file),
-            version=version_text,
+            stdout_path=str(st.stdout_file),
+            stderr_path=str(st.stderr_file),
+            version=st.version_text,
             artifacts=artifacts_meta,
             dut={"host": self.dut.host, "transport": self.dut.transport, **(self.dut.meta or {})},
             message=msg,
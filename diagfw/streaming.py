@@ -1,57 +1,201 @@
 from __future__ import annotations
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime, timezone
-import uuid, json, socket, base64, pathlib, socketserver
+import uuid, json, socket, base64, pathlib, select, socketserver, threading, time, os, re, codecs
+
+from ._util import _uring_wait_cqe, _write_all, liburing, orjson
+
+try:
+    import pybase64 as _b64  # optional, SIMD-accelerated drop-in for base64
+except ImportError:
+    _b64 = base64
+
+def _ndjson_line(rec: dict) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(rec, option=orjson.OPT_APPEND_NEWLINE)
+        except Exception:
+            pass
+    return (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8", "replace")
+
+def _json_bytes(value) -> bytes:
+    """One JSON value as UTF-8 bytes, for splicing into pre-encoded records."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except Exception:
+            pass
+    return json.dumps(value, ensure_ascii=False).encode("utf-8", "replace")
+
+def _parse_line(line: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(line)  # takes bytes directly, no decode step
+    return json.loads(line.decode("utf-8"))
+
+_iso_cache = (-1, "")
+
+def _fast_iso() -> str:
+    """UTC ISO‑8601 timestamp with microseconds; the date/time prefix is formatted once per second."""
+    global _iso_cache
+    t = time.time()
+    s = int(t)
+    sec, prefix = _iso_cache
+    if sec != s:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(s))
+        _iso_cache = (s, prefix)
+    return f"{prefix}.{int((t - s) * 1e6):06d}+00:00"
 
 class StreamSink:
+    discards = False  # True: records are dropped, so StreamMux skips building them
     def open(self): ...
     def close(self): ...
     def send(self, rec: dict): ...  # one NDJSON record
+    def send_raw(self, data: bytes):  # one encoded NDJSON line, newline included
+        return NotImplemented
+    def flush(self): ...  # push out anything the sink has buffered
 
 class NullSink(StreamSink):
+    discards = True
     def send(self, rec: dict): pass
+    def send_raw(self, data: bytes): pass
+
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
 
 class TCPSink(StreamSink):
-    def __init__(self, host: str = "127.0.0.1", port: int = 9901, reconnect: bool = True):
+    """Collects encoded records and writes each batch with one gathering sendmsg.
+
+    A batch goes out once it reaches `batch_bytes`, or at the latest `batch_interval` seconds
+    after its first record: a per-sink flusher thread enforces the deadline, so the tail of a
+    burst does not wait for the next record. flush() (and close()) push out immediately."""
+    def __init__(self, host: str = "127.0.0.1", port: int = 9901, reconnect: bool = True,
+                 batch_bytes: int = 65536, batch_interval: float = 0.005):
         self.host = host; self.port = port
         self.reconnect = reconnect
+        self.batch_bytes = batch_bytes
+        self.batch_interval = batch_interval
         self.sock: socket.socket|None = None
+        self._chunks: List[bytes] = []
+        self._size = 0
+        self._deadline = 0.0  # when the oldest buffered record must have been sent
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._flusher: Optional[threading.Thread] = None
 
     def open(self):
         self.sock = socket.create_connection((self.host, self.port), timeout=3)
 
     def close(self):
         try:
+            with self._cond:
+                self._flush_locked()
+                self._flusher = None  # tells the running flusher to exit
+                self._cond.notify_all()
             if self.sock:
                 self.sock.close()
         finally:
             self.sock = None
 
     def send(self, rec: dict):
-        data = (json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8", "replace")
+        self.send_raw(_ndjson_line(rec))
+
+    def send_raw(self, data: bytes):
+        with self._cond:
+            if not self._chunks:
+                self._deadline = time.monotonic() + self.batch_interval
+                if self._flusher is None:
+                    self._flusher = threading.Thread(
+                        target=self._flush_loop, name="TCPSinkFlush", daemon=True)
+                    self._flusher.start()
+                self._cond.notify()
+            self._chunks.append(data)
+            self._size += len(data)
+            if self._size >= self.batch_bytes:
+                self._flush_locked()
+
+    def _flush_loop(self):
+        me = threading.current_thread()
+        with self._cond:
+            while self._flusher is me:
+                if not self._chunks:
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._chunks:
+            return
+        chunks = self._chunks
+        self._chunks = []
+        self._size = 0
         try:
             if not self.sock:
                 self.open()
             assert self.sock is not None
-            self.sock.sendall(data)
+            self._send_chunks(chunks)
         except Exception:
             if self.reconnect:
                 try:
                     self.open(); assert self.sock is not None
-                    self.sock.sendall(data)
+                    self._send_chunks(chunks)
                 except Exception:
                     pass
 
+    def _send_chunks(self, chunks: List[bytes]):
+        sock = self.sock
+        assert sock is not None
+        if not hasattr(sock, "sendmsg"):
+            sock.sendall(b"".join(chunks))
+            return
+        # The kernel gathers the buffers; resume after partial sends.
+        bufs = [memoryview(c) for c in chunks]
+        i = 0
+        while i < len(bufs):
+            sent = sock.sendmsg(bufs[i:i+_IOV_MAX])
+            while sent:
+                n = len(bufs[i])
+                if sent >= n:
+                    sent -= n
+                    i += 1
+                else:
+                    bufs[i] = bufs[i][sent:]
+                    sent = 0
+
 class StreamMux:
-    """Assigns stream_id per source name and emits NDJSON records to sink."""
+    """Assigns stream_id per source name and emits NDJSON records to sink.
+
+    Sinks that implement send_raw get records pre-encoded from cached byte segments, so only
+    ts/seq/payload are serialized per record; others receive the dict via send()."""
     def __init__(self, sink: Optional[StreamSink], run_id: str, test_name: str, dut):
+        if sink is not None and getattr(sink, "discards", False):
+            sink = None  # same as no sink: every emit returns before encoding anything
         self.sink = sink
         self.run_id = run_id
         self.test_name = test_name
         self.dut = dut
         self._seq = 0
         self._streams: Dict[str, str] = {}
+        self._dut_host = getattr(dut, "host", "unknown")
+        self._raw = sink is not None and type(sink).send_raw is not StreamSink.send_raw
+        self._const_bytes = b',"run_id":%s,"test":%s,"dut":%s' % (
+            _json_bytes(run_id), _json_bytes(test_name), _json_bytes(self._dut_host))
+        self._source_bytes: Dict[str, bytes] = {}
+        if sink is not None:
+            # Bind the per-test sources up front so the emit path only does a plain lookup.
+            bind = self._source_prefix if self._raw else self.stream_id
+            for name in ("stdout", "stderr", "uart"):
+                bind(name)
 
     def stream_id(self, name: str) -> str:
         sid = self._streams.get(name)
@@ -60,18 +204,40 @@ class StreamMux:
             self._streams[name] = sid
         return sid
 
+    def _source_prefix(self, name: str) -> bytes:
+        prefix = self._source_bytes.get(name)
+        if prefix is None:
+            prefix = b',"source":%s,"stream_id":%s' % (
+                _json_bytes(name), _json_bytes(self.stream_id(name)))
+            self._source_bytes[name] = prefix
+        return prefix
+
+    def _send_raw(self, name: str, body: bytes, meta: dict|None):
+        parts = [b'{"ts":"', _fast_iso().encode(), b'","seq":', str(self._seq).encode(),
+                 self._const_bytes, self._source_prefix(name), body]
+        if meta:
+            parts += (b',"meta":', _json_bytes(meta))
+        parts.append(b"}\n")
+        self.sink.send_raw(b"".join(parts))
+
     def emit_text(self, name: str, text: str, meta: dict|None = None):
         if not self.sink:
             return
         self._seq += 1
+        if self._raw:
+            try:
+                self._send_raw(name, b',"text":' + _json_bytes(text) + b',"encoding":"utf-8"', meta)
+            except Exception:
+                pass
+            return
         rec = {
-            "ts": datetime.now(timezone.utc).isoformat(),
+            "ts": _fast_iso(),
             "seq": self._seq,
             "run_id": self.run_id,
             "test": self.test_name,
-            "dut": getattr(self.dut, "host", "unknown"),
+            "dut": self._dut_host,
             "source": name,
-            "stream_id": self.stream_id(name),
+            "stream_id": self._streams.get(name) or self.stream_id(name),
             "text": text,
             "encoding": "utf-8",
         }
@@ -82,19 +248,58 @@ class StreamMux:
         except Exception:
             pass
 
+    def emit_chunked(self, name: str, text: str, meta: dict|None = None, chunk: int = 32768):
+        """Emit captured text as a few size-bounded records instead of one per line."""
+        if not self.sink:
+            return
+        for i in range(0, len(text), chunk):
+            self.emit_text(name, text[i:i+chunk], meta={**(meta or {}), "chunk_index": i // chunk})
+
+    def emit_file(self, name: str, fp, meta: dict|None = None, chunk: int = 32768):
+        """emit_chunked for a binary file object: read and decode one chunk at a time, so
+        the whole content is never held as a str. Characters split across chunks survive."""
+        if not self.sink:
+            return
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        index = 0
+        while True:
+            data = fp.read(chunk)
+            text = decoder.decode(data, final=not data)
+            if text:
+                self.emit_text(name, text, meta={**(meta or {}), "chunk_index": index})
+                index += 1
+            if not data:
+                break
+
+    def flush(self):
+        if not self.sink:
+            return
+        try:
+            self.sink.flush()
+        except Exception:
+            pass
+
     def emit_blob(self, name: str, data: bytes, meta: dict|None = None):
         if not self.sink:
             return
         self._seq += 1
+        if self._raw:
+            try:
+                # base64 output is ASCII bytes already; no str round trip
+                self._send_raw(name, b',"blob_b64":"' + _b64.b64encode(data)
+                               + b'","encoding":"base64"', meta)
+            except Exception:
+                pass
+            return
         rec = {
-            "ts": datetime.now(timezone.utc).isoformat(),
+            "ts": _fast_iso(),
             "seq": self._seq,
             "run_id": self.run_id,
             "test": self.test_name,
-            "dut": getattr(self.dut, "host", "unknown"),
+            "dut": self._dut_host,
             "source": name,
-            "stream_id": self.stream_id(name),
-            "blob_b64": base64.b64encode(data).decode("ascii"),
+            "stream_id": self._streams.get(name) or self.stream_id(name),
+            "blob_b64": _b64.b64encode(data).decode("ascii"),
             "encoding": "base64",
         }
         if meta:
@@ -105,36 +310,184 @@ class StreamMux:
             pass
 
 # Collector server (central aggregator)
+class _UringAppender:
+    """Batches appends to many fds into one io_uring_enter per flush.
+
+    Appends for the same fd are joined into a single write and every batch is reaped before
+    the next is submitted, so per-file ordering matches plain sequential writes."""
+    def __init__(self, entries: int = 256, max_pending: int = 64, interval: float = 0.005):
+        self._ring = liburing.Ring()
+        self._cqe = liburing.Cqe()
+        liburing.io_uring_queue_init(entries, self._ring)
+        self.entries = entries
+        self.max_pending = max_pending
+        self.interval = interval
+        self._pending: Dict[int, List[bytes]] = {}
+        self._count = 0
+        self._last = time.monotonic()
+
+    def write(self, fd: int, data: bytes) -> None:
+        parts = self._pending.get(fd)
+        if parts is None:
+            self._pending[fd] = [data]
+        else:
+            parts.append(data)
+        self._count += 1
+        if self._count >= self.max_pending or time.monotonic() - self._last >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last = time.monotonic()
+        if not self._pending:
+            return
+        items = [(fd, b"".join(parts)) for fd, parts in self._pending.items()]
+        self._pending = {}
+        self._count = 0
+        for start in range(0, len(items), self.entries):
+            batch = items[start:start+self.entries]  # keeps buffers alive until reaped
+            for idx, (fd, data) in enumerate(batch):
+                sqe = liburing.io_uring_get_sqe(self._ring)
+                liburing.io_uring_prep_write(sqe, fd, data, len(data), -1)
+                liburing.io_uring_sqe_set_data64(sqe, idx)
+            liburing.io_uring_submit(self._ring)
+            for _ in batch:
+                _uring_wait_cqe(self._ring, self._cqe)  # not io_uring_wait_cqe: see there
+                cqe = self._cqe[0]
+                res, idx = cqe.res, cqe.user_data
+                liburing.io_uring_cqe_seen(self._ring, cqe)
+                fd, data = batch[idx]
+                if res < len(data):
+                    # short write or error: finish (or raise) synchronously
+                    _write_all(fd, memoryview(data)[max(res, 0):])
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            liburing.io_uring_queue_exit(self._ring)
+
+class _UringFile:
+    """Append-only file whose writes go through a shared _UringAppender."""
+    def __init__(self, uring: _UringAppender, path: pathlib.Path):
+        self._uring = uring
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+    def write(self, data: bytes) -> None:
+        self._uring.write(self._fd, data)
+
+    def close(self) -> None:
+        try:
+            self._uring.flush()
+        finally:
+            os.close(self._fd)
+
+def _open_uring() -> Optional[_UringAppender]:
+    """Return an io_uring appender, or None if liburing or IORING_OP_WRITE (5.6+) is missing."""
+    if liburing is None:
+        return None
+    try:
+        m = re.match(r"(\d+)\.(\d+)", os.uname().release)
+        if not m or (int(m.group(1)), int(m.group(2))) < (5, 6):
+            return None
+        return _UringAppender()
+    except Exception:
+        return None
+
 class NDJSONHandler(socketserver.StreamRequestHandler):
+    max_open_files = 128   # per connection; least recently used handle is closed beyond this
+    # Opt-in (serve_streams(use_io_uring=True), collector --io-uring): with the Python liburing
+    # bindings, per-SQE call overhead outweighs the saved write() syscalls for small records.
+    use_io_uring = False
+    flush_interval = 0.005  # upper bound on how long received records sit in write buffers
+
     def handle(self):
-        while True:
-            line = self.rfile.readline()
-            if not line:
-                break
+        # Append handles reused across records; keyed by (run, test, sid, src) for raw NDJSON
+        # and (run, test, src) for the human log.
+        files: "OrderedDict[tuple, object]" = OrderedDict()
+        dirty: set = set()
+        uring = _open_uring() if getattr(self.server, "use_io_uring", self.use_io_uring) else None
+
+        def get(key: tuple, run: str, test: str, name: str):
+            f = files.get(key)
+            if f is None:
+                dirp = pathlib.Path("streams")/run/test
+                dirp.mkdir(parents=True, exist_ok=True)
+                if uring is not None:
+                    f = files[key] = _UringFile(uring, dirp / name)
+                else:
+                    f = files[key] = open(dirp / name, "ab", buffering=65536)
+                if len(files) > self.max_open_files:
+                    old = files.popitem(last=False)[1]
+                    dirty.discard(old)
+                    old.close()
+            else:
+                files.move_to_end(key)
+            dirty.add(f)
+            return f
+
+        def flush():
+            if uring is not None:
+                uring.flush()
+            else:
+                for f in dirty:
+                    f.flush()
+            dirty.clear()
+
+        def record(line: bytes):
             try:
-                obj = json.loads(line.decode("utf-8"))
+                obj = _parse_line(line)
             except Exception:
-                continue
+                return
             run = obj.get("run_id", "unknown")
             test = obj.get("test", "unknown")
             sid = obj.get("stream_id", "stream")
             src = obj.get("source", "src")
-            dirp = pathlib.Path("streams")/run/test
-            dirp.mkdir(parents=True, exist_ok=True)
             # raw NDJSON per stream
-            with open(dirp / f"{sid}_{src}.ndjson", "ab") as f:
-                f.write(line)
+            get((run, test, sid, src), run, test, f"{sid}_{src}.ndjson").write(line)
             # human log per source
-            if "text" in obj:
-                with open(dirp / f"{src}.log", "a", encoding="utf-8", errors="replace") as f2:
-                    f2.write(obj["text"])  # append
+            text = obj.get("text")
+            if isinstance(text, str):
+                get((run, test, src), run, test, f"{src}.log").write(
+                    text.encode("utf-8", "replace"))  # append
+
+        # Read the socket directly rather than through rfile so we know when the input is
+        # drained: buffered records are written out before blocking for more, and at least
+        # every flush_interval while a sender keeps the connection busy.
+        sock = self.connection
+        tail = b""
+        last_flush = time.monotonic()
+        try:
+            while True:
+                if dirty and (time.monotonic() - last_flush >= self.flush_interval
+                              or not select.select([sock], [], [], 0)[0]):
+                    flush()
+                    last_flush = time.monotonic()
+                data = sock.recv(65536)
+                if not data:
+                    break
+                *lines, tail = (tail + data).split(b"\n")
+                for line in lines:
+                    record(line + b"\n")
+            if tail:
+                record(tail)
+        finally:
+            for f in files.values():
+                try: f.close()
+                except Exception: pass
+            if uring is not None:
+                try: uring.close()
+                except Exception: pass
 
 class ThreadingTCPServer(socketserver.ThreadingTCPServer):
     allow_reuse_address = True
 
-def serve_streams(host: str = "0.0.0.0", port: int = 9901) -> ThreadingTCPServer:
+def serve_streams(host: str = "0.0.0.0", port: int = 9901, *,
+                  use_io_uring: Optional[bool] = None) -> ThreadingTCPServer:
+    """Run the collector on a daemon thread. use_io_uring=True batches file writes through
+    io_uring where liburing and the kernel support it; None keeps NDJSONHandler's default."""
     srv = ThreadingTCPServer((host, port), NDJSONHandler)
-    import threading
+    if use_io_uring is not None:
+        srv.use_io_uring = use_io_uring  # handlers look here before their class default
     t = threading.Thread(target=srv.serve_forever, daemon=True)
     t.start()
     return srv
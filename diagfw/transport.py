@@ -1,16 +1,249 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional, Dict, Callable, List
+from typing import Optional, Dict, Callable, List, Any
 import subprocess, shlex, time, contextlib
+import asyncio, functools
+import selectors
+import threading
 import socket
 import os
 
+_READ_CHUNK = 1 << 16
+_EXITED = object()  # selector key data for the process-exit pidfd
+
 @dataclass
 class ProcOutput:
     rc: int
     stdout: str
     stderr: str
 
+def _encode_stdin(stdin: Optional[str]) -> Optional[bytes]:
+    return None if stdin is None else stdin.encode("utf-8")
+
+def _proc_output(p: subprocess.CompletedProcess) -> ProcOutput:
+    # Capture bytes and decode once; text=True would run an incremental decoder per read.
+    return ProcOutput(rc=p.returncode,
+                      stdout=p.stdout.decode("utf-8", "replace"),
+                      stderr=p.stderr.decode("utf-8", "replace"))
+
+def _feed_stdin(p: subprocess.Popen, stdin: Optional[str]) -> None:
+    if stdin and p.stdin:
+        try:
+            p.stdin.write(stdin.encode("utf-8"))
+            p.stdin.close()
+        except Exception:
+            pass
+
+def _kill(p: subprocess.Popen) -> None:
+    with contextlib.suppress(Exception):
+        p.kill()
+
+def _emit_lines(buf: bytearray, cb: Optional[Callable[[str], None]], final: bool = False) -> None:
+    """Pass each complete line in `buf` to `cb` and drop it; on `final` also the unterminated tail."""
+    start = 0
+    while (i := buf.find(b"\n", start)) != -1:
+        if cb:
+            cb(buf[start:i+1].decode("utf-8", "replace"))
+        start = i + 1
+    if final and start < len(buf):
+        if cb:
+            cb(buf[start:].decode("utf-8", "replace"))
+        start = len(buf)
+    del buf[:start]
+
+def _pump_lines_threaded(p: subprocess.Popen, timeout: Optional[int],
+                         on_stdout: Optional[Callable[[str], None]],
+                         on_stderr: Optional[Callable[[str], None]]) -> int:
+    """_pump_lines for platforms where select() only takes sockets (Windows): one blocking
+    reader thread per pipe, still reading chunks and splitting lines locally."""
+    def reader(pipe, cb):
+        buf = bytearray()
+        try:
+            while data := pipe.read(_READ_CHUNK):
+                buf += data
+                _emit_lines(buf, cb)
+        except (OSError, ValueError):
+            pass
+        finally:
+            _emit_lines(buf, cb, final=True)
+            with contextlib.suppress(Exception):
+                pipe.close()
+
+    threads = [threading.Thread(target=reader, args=(pipe, cb), daemon=True)
+               for pipe, cb in ((p.stdout, on_stdout), (p.stderr, on_stderr)) if pipe is not None]
+    for th in threads:
+        th.start()
+    try:
+        rc = p.wait(timeout=timeout or None)
+    except subprocess.TimeoutExpired:
+        _kill(p)
+        rc = 124
+    # Pipes normally hit EOF with the exit; don't wait on a background child holding them.
+    until = time.monotonic() + 0.5
+    for th in threads:
+        th.join(timeout=max(0.0, until - time.monotonic()))
+    return rc
+
+def _pump_lines(p: subprocess.Popen, timeout: Optional[int],
+                on_stdout: Optional[Callable[[str], None]],
+                on_stderr: Optional[Callable[[str], None]]) -> int:
+    """Multiplex the binary stdout/stderr pipes of `p` on one thread and deliver TEXT lines.
+
+    Pipes are read in large non-blocking chunks and split on b"\\n" locally, so the cost is
+    one syscall per chunk rather than per line. select() is the only place this blocks, and
+    each readiness event gets one read, so a flooding pipe can neither starve the other one
+    nor keep the deadline from being checked. Returns the exit code (124 on timeout)."""
+    if os.name != "posix":
+        return _pump_lines_threaded(p, timeout, on_stdout, on_stderr)
+    sel = selectors.DefaultSelector()
+    bufs: Dict[int, bytearray] = {}
+    for pipe, cb in ((p.stdout, on_stdout), (p.stderr, on_stderr)):
+        if pipe is not None:
+            fd = pipe.fileno()
+            os.set_blocking(fd, False)
+            sel.register(fd, selectors.EVENT_READ, cb)
+            bufs[fd] = bytearray()
+
+    def deliver(fd: int, cb, final: bool = False):
+        _emit_lines(bufs[fd], cb, final)
+
+    def drain(fd: int, cb) -> bool:
+        # One read; unregister on EOF. True if the read was full, i.e. more may be pending.
+        try:
+            data = os.read(fd, _READ_CHUNK)
+        except BlockingIOError:
+            return False
+        except OSError:
+            data = b""
+        if not data:
+            deliver(fd, cb, final=True)
+            sel.unregister(fd)
+            return False
+        bufs[fd] += data
+        deliver(fd, cb)
+        return len(data) == _READ_CHUNK
+
+    # A pidfd becomes readable when the process exits, so exit wakes select() directly.
+    # Without one (non-Linux, old kernels) fall back to checking p.poll() every 0.5 s.
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(p.pid)
+            sel.register(pidfd, selectors.EVENT_READ, _EXITED)
+        except OSError:
+            pidfd = None
+
+    def pipes_open() -> bool:
+        return any(key.data is not _EXITED for key in sel.get_map().values())
+
+    deadline = time.monotonic() + timeout if timeout else None
+    rc = None
+    try:
+        while pipes_open():
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                _kill(p)
+                rc = 124
+                break
+            if pidfd is not None:
+                wait = None if deadline is None else deadline - now
+            else:
+                wait = 0.5 if deadline is None else min(deadline - now, 0.5)
+            events = sel.select(timeout=wait)
+            exited = False
+            for key, _ in events:
+                if key.data is _EXITED:
+                    exited = True
+                else:
+                    drain(key.fd, key.data)
+            if exited or (pidfd is None and not events and p.poll() is not None):
+                # Exited, but a background child may still hold the pipes open: take what is
+                # already buffered, without chasing a writer that keeps going past the deadline.
+                for key in list(sel.get_map().values()):
+                    if key.data is not _EXITED:
+                        while drain(key.fd, key.data) and (deadline is None
+                                                           or time.monotonic() < deadline):
+                            pass
+                break
+    finally:
+        for key in list(sel.get_map().values()):
+            if key.data is not _EXITED:
+                deliver(key.fd, key.data, final=True)
+        sel.close()
+        if pidfd is not None:
+            os.close(pidfd)
+        for pipe in (p.stdout, p.stderr):
+            if pipe is not None:
+                with contextlib.suppress(Exception):
+                    pipe.close()
+
+    if rc is None:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            rc = p.wait(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            _kill(p)
+            rc = 124
+    return rc
+
+class _LineProtocol(asyncio.SubprocessProtocol):
+    """Splits pipe data into TEXT lines for the callbacks as the event loop delivers it."""
+    def __init__(self, loop: asyncio.AbstractEventLoop,
+                 on_stdout: Optional[Callable[[str], None]],
+                 on_stderr: Optional[Callable[[str], None]]):
+        self._cbs = {1: on_stdout, 2: on_stderr}
+        self._bufs = {1: bytearray(), 2: bytearray()}
+        self._open = {1, 2}
+        self.exited = loop.create_future()
+        self.pipes_closed = loop.create_future()
+
+    def pipe_data_received(self, fd: int, data: bytes) -> None:
+        buf = self._bufs[fd]
+        buf += data
+        _emit_lines(buf, self._cbs[fd])
+
+    def pipe_connection_lost(self, fd: int, exc: Optional[Exception]) -> None:
+        if fd in self._open:
+            self._open.discard(fd)
+            _emit_lines(self._bufs[fd], self._cbs[fd], final=True)
+            if not self._open and not self.pipes_closed.done():
+                self.pipes_closed.set_result(None)
+
+    def process_exited(self) -> None:
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+    def finish(self) -> None:
+        for fd in sorted(self._open):
+            _emit_lines(self._bufs[fd], self._cbs[fd], final=True)
+
+async def _pump_lines_async(spawn: Callable[..., Any], stdin: Optional[str], timeout: Optional[int],
+                            on_stdout: Optional[Callable[[str], None]],
+                            on_stderr: Optional[Callable[[str], None]]) -> int:
+    """Event-loop counterpart of _pump_lines: same line semantics and return codes.
+    `spawn(protocol_factory, **pipes)` is loop.subprocess_shell/exec with the command bound."""
+    proto = _LineProtocol(asyncio.get_running_loop(), on_stdout, on_stderr)
+    transport, _ = await spawn(lambda: proto, stdin=subprocess.PIPE if stdin else None,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        if stdin:
+            with contextlib.suppress(Exception):
+                w = transport.get_pipe_transport(0)
+                w.write(stdin.encode("utf-8"))
+                w.close()
+        done, _ = await asyncio.wait({proto.exited}, timeout=timeout or None)
+        if not done:
+            with contextlib.suppress(Exception):
+                transport.kill()
+            return 124
+        # Pipes normally hit EOF with the exit; don't wait on a background child holding them.
+        await asyncio.wait({proto.pipes_closed}, timeout=0.5)
+        rc = transport.get_returncode()
+        return rc if rc is not None else 0
+    finally:
+        proto.finish()
+        transport.close()
+
 class Transport:
     def run(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
             cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None) -> ProcOutput:
@@ -24,16 +257,45 @@ class Transport:
         Return process exit code. Implementations should be best‑effort."""
         raise NotImplementedError
 
+    async def stream_async(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
+                           cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None,
+                           on_stdout: Optional[Callable[[str], None]] = None,
+                           on_stderr: Optional[Callable[[str], None]] = None) -> int:
+        """Awaitable stream(). Callbacks run on the event loop thread. Transports without a
+        native implementation run stream() on the default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(
+            self.stream, cmd, stdin=stdin, timeout=timeout, cwd=cwd, env=env,
+            on_stdout=on_stdout, on_stderr=on_stderr))
+
     def read_text(self, path: str, max_bytes: int = 64_000) -> Optional[str]:
         """Best‑effort to read a file's content from DUT. Return None if not readable."""
         raise NotImplementedError
 
+    def read_bytes(self, path: str, max_bytes: int = 64_000) -> Optional[bytes]:
+        """Like read_text, but the raw bytes without decoding."""
+        content = self.read_text(path, max_bytes)
+        return None if content is None else content.encode("utf-8", "replace")
+
+    def close(self) -> None:
+        """Release any connection state held by the transport."""
+
+    def read_to(self, path: str, dst_path: str | os.PathLike, max_bytes: int = 64_000) -> Optional[int]:
+        """Best‑effort copy of up to max_bytes of a DUT file into local dst_path.
+        Return the number of bytes written, or None if not readable."""
+        data = self.read_bytes(path, max_bytes)
+        if data is None:
+            return None
+        with open(dst_path, "wb") as f:
+            f.write(data)
+        return len(data)
+
 class LocalTransport(Transport):
     def run(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
             cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None) -> ProcOutput:
-        p = subprocess.run(cmd, input=stdin, text=True, capture_output=True, timeout=timeout,
+        p = subprocess.run(cmd, input=_encode_stdin(stdin), capture_output=True, timeout=timeout,
                            cwd=cwd, env=env, shell=True)
-        return ProcOutput(rc=p.returncode, stdout=p.stdout, stderr=p.stderr)
+        return _proc_output(p)
 
     def stream(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
                cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None,
@@ -42,64 +304,71 @@ class LocalTransport(Transport):
         p = subprocess.Popen(cmd, shell=True, cwd=cwd, env=env,
                              stdin=subprocess.PIPE if stdin else None,
                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                             text=True, bufsize=1)
-        if stdin and p.stdin:
-            try:
-                p.stdin.write(stdin)
-                p.stdin.close()
-            except Exception:
-                pass
-
-        def reader(pipe, cb):
-            try:
-                for line in iter(pipe.readline, ""):
-                    if cb:
-                        cb(line)
-            finally:
-                try:
-                    pipe.close()
-                except Exception:
-                    pass
-
-        th_out = None
-        th_err = None
-        if p.stdout:
-            import threading
-            th_out = threading.Thread(target=reader, args=(p.stdout, on_stdout), daemon=True)
-            th_out.start()
-        if p.stderr:
-            import threading
-            th_err = threading.Thread(target=reader, args=(p.stderr, on_stderr), daemon=True)
-            th_err.start()
-
-        start = time.time()
-        rc = None
-        while True:
-            rc = p.poll()
-            if rc is not None:
-                break
-            if timeout and (time.time() - start) > timeout:
-                with contextlib.suppress(Exception):
-                    p.kill()
-                rc = 124
-                break
-            time.sleep(0.05)
-        if th_out: th_out.join(timeout=2)
-        if th_err: th_err.join(timeout=2)
-        return rc if rc is not None else (p.returncode or 0)
+                             bufsize=0)
+        _feed_stdin(p, stdin)
+        return _pump_lines(p, timeout, on_stdout, on_stderr)
+
+    async def stream_async(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
+                           cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None,
+                           on_stdout: Optional[Callable[[str], None]] = None,
+                           on_stderr: Optional[Callable[[str], None]] = None) -> int:
+        loop = asyncio.get_running_loop()
+        spawn = functools.partial(loop.subprocess_shell, cmd=cmd, cwd=cwd, env=env)
+        return await _pump_lines_async(spawn, stdin, timeout, on_stdout, on_stderr)
 
     def read_text(self, path: str, max_bytes: int = 64_000) -> Optional[str]:
+        data = self.read_bytes(path, max_bytes)
+        return None if data is None else data.decode(errors="replace")
+
+    def read_bytes(self, path: str, max_bytes: int = 64_000) -> Optional[bytes]:
         try:
             with open(path, "rb") as f:
-                data = f.read(max_bytes)
-            return data.decode(errors="replace")
+                return f.read(max_bytes)
+        except Exception:
+            return None
+
+    def read_to(self, path: str, dst_path: str | os.PathLike, max_bytes: int = 64_000) -> Optional[int]:
+        try:
+            with open(path, "rb") as src, open(dst_path, "wb") as dst:
+                sent = 0
+                try:
+                    # in-kernel copy, no round trip through Python buffers
+                    while sent < max_bytes:
+                        n = os.sendfile(dst.fileno(), src.fileno(), sent, max_bytes - sent)
+                        if n == 0:
+                            break
+                        sent += n
+                except (AttributeError, OSError):
+                    src.seek(sent)
+                    dst.seek(sent)
+                    data = src.read(max_bytes - sent)
+                    dst.write(data)
+                    sent += len(data)
+            return sent
         except Exception:
             return None
 
 class SSHTransport(Transport):
     def __init__(self, host: str, user: Optional[str] = None, ssh_opts: Optional[List[str]] = None):
         self.target = f"{user+'@' if user else ''}{host}"
-        self.ssh_opts = ssh_opts or ["-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=accept-new"]
+        if not ssh_opts:
+            # Share one master connection per target so later commands skip the handshake.
+            # ssh exits instead of falling back if the ControlPath directory is missing.
+            with contextlib.suppress(OSError):
+                os.makedirs(os.path.expanduser("~/.ssh"), mode=0o700, exist_ok=True)
+            ssh_opts = ["-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=accept-new",
+                        "-o", "ControlMaster=auto", "-o", "ControlPath=~/.ssh/diagfw-%C",
+                        "-o", "ControlPersist=60s"]
+        self.ssh_opts = ssh_opts
+        self._ssh_prefix = ["ssh", *self.ssh_opts, self.target]
+
+    def close(self) -> None:
+        """Ask the ControlMaster for this target (if any) to stop accepting sessions. The
+        master is shared through ControlPath, so in-flight sessions (possibly someone else's)
+        finish normally and the master exits after the last one, rather than being cut off."""
+        with contextlib.suppress(Exception):
+            subprocess.run(["ssh", *self.ssh_opts, "-O", "stop", self.target],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
 
     def _wrap_cmd(self, cmd: str, cwd: Optional[str], env: Optional[Dict[str,str]]) -> List[str]:
         env_prefix = ""
@@ -108,13 +377,13 @@ class SSHTransport(Transport):
             env_prefix = f"{assigns} "
         cd_prefix = f"cd {shlex.quote(cwd)} && " if cwd else ""
         wrapped = f"bash -lc {shlex.quote(env_prefix + cd_prefix + cmd)}"
-        return ["ssh", *self.ssh_opts, self.target, wrapped]
+        return [*self._ssh_prefix, wrapped]
 
     def run(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
             cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None) -> ProcOutput:
         ssh_cmd = self._wrap_cmd(cmd, cwd, env)
-        p = subprocess.run(ssh_cmd, input=stdin, text=True, capture_output=True, timeout=timeout)
-        return ProcOutput(rc=p.returncode, stdout=p.stdout, stderr=p.stderr)
+        p = subprocess.run(ssh_cmd, input=_encode_stdin(stdin), capture_output=True, timeout=timeout)
+        return _proc_output(p)
 
     def stream(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
                cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None,
@@ -123,52 +392,46 @@ class SSHTransport(Transport):
         ssh_cmd = self._wrap_cmd(cmd, cwd, env)
         p = subprocess.Popen(ssh_cmd, stdin=subprocess.PIPE if stdin else None,
                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                             text=True, bufsize=1)
-        if stdin and p.stdin:
-            try:
-                p.stdin.write(stdin)
-                p.stdin.close()
-            except Exception:
-                pass
-
-        def reader(pipe, cb):
-            try:
-                for line in iter(pipe.readline, ""):
-                    if cb:
-                        cb(line)
-            finally:
-                try:
-                    pipe.close()
-                except Exception:
-                    pass
-
-        import threading
-        th_out = threading.Thread(target=reader, args=(p.stdout, on_stdout), daemon=True)
-        th_err = threading.Thread(target=reader, args=(p.stderr, on_stderr), daemon=True)
-        th_out.start(); th_err.start()
-
-        start = time.time()
-        rc = None
-        while True:
-            rc = p.poll()
-            if rc is not None:
-                break
-            if timeout and (time.time() - start) > timeout:
-                with contextlib.suppress(Exception):
-                    p.kill()
-                rc = 124
-                break
-            time.sleep(0.05)
-        th_out.join(timeout=2); th_err.join(timeout=2)
-        return rc if rc is not None else (p.returncode or 0)
+                             bufsize=0)
+        _feed_stdin(p, stdin)
+        return _pump_lines(p, timeout, on_stdout, on_stderr)
+
+    async def stream_async(self, cmd: str, *, stdin: Optional[str]=None, timeout: Optional[int]=None,
+                           cwd: Optional[str]=None, env: Optional[Dict[str,str]]=None,
+                           on_stdout: Optional[Callable[[str], None]] = None,
+                           on_stderr: Optional[Callable[[str], None]] = None) -> int:
+        loop = asyncio.get_running_loop()
+        ssh_cmd = self._wrap_cmd(cmd, cwd, env)
+        def spawn(factory, **pipes):
+            return loop.subprocess_exec(factory, *ssh_cmd, **pipes)
+        return await _pump_lines_async(spawn, stdin, timeout, on_stdout, on_stderr)
 
     def read_text(self, path: str, max_bytes: int = 64_000) -> Optional[str]:
+        data = self.read_bytes(path, max_bytes)
+        return None if data is None else data.decode(errors="replace")
+
+    def read_bytes(self, path: str, max_bytes: int = 64_000) -> Optional[bytes]:
         try:
             remote = f"bash -lc {shlex.quote(f'head -c {max_bytes} {shlex.quote(path)}')}"
-            ssh_cmd = ["ssh", *self.ssh_opts, self.target, remote]
-            p = subprocess.run(ssh_cmd, text=True, capture_output=True, timeout=10)
+            ssh_cmd = [*self._ssh_prefix, remote]
+            p = subprocess.run(ssh_cmd, capture_output=True, timeout=10)
             if p.returncode == 0:
                 return p.stdout
         except Exception:
             pass
         return None
+
+    def read_to(self, path: str, dst_path: str | os.PathLike, max_bytes: int = 64_000) -> Optional[int]:
+        remote = f"bash -lc {shlex.quote(f'head -c {max_bytes} {shlex.quote(path)}')}"
+        ssh_cmd = [*self._ssh_prefix, remote]
+        try:
+            # ssh writes straight into the destination file
+            with open(dst_path, "wb") as dst:
+                p = subprocess.run(ssh_cmd, stdout=dst, stderr=subprocess.DEVNULL, timeout=10)
+            if p.returncode == 0:
+                return os.path.getsize(dst_path)
+        except Exception:
+            pass
+        with contextlib.suppress(Exception):
+            os.unlink(dst_path)
+        return None
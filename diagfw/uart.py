@@ -1,9 +1,123 @@
 from __future__ import annotations
+from concurrent import futures
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Optional, Callable
-import pathlib, threading, time
+from typing import Optional, Callable, Dict, Literal, get_args
+import array, errno, mmap, os, pathlib, queue, select, sys, threading, time
 
-@dataclass
+from ._util import _SLOTS, _uring_wait_cqe, _write_all, liburing
+
+try:
+    import serial  # pyserial
+    from serial import EIGHTBITS, SEVENBITS, SIXBITS, FIVEBITS
+    from serial import PARITY_NONE, PARITY_EVEN, PARITY_ODD, PARITY_MARK, PARITY_SPACE
+    from serial import STOPBITS_ONE, STOPBITS_ONE_POINT_FIVE, STOPBITS_TWO
+    _SIZE = (None,) * 5 + (FIVEBITS, SIXBITS, SEVENBITS, EIGHTBITS)  # indexed by bytesize
+    _PARITY = {"N":PARITY_NONE,"E":PARITY_EVEN,"O":PARITY_ODD,"M":PARITY_MARK,"S":PARITY_SPACE}
+    _STOP = (None, None, STOPBITS_ONE, STOPBITS_ONE_POINT_FIVE, STOPBITS_TWO)  # by 2*stopbits
+    _HAVE_SERIAL, _SERIAL_ERR = True, ""
+except Exception as e:
+    serial = None
+    _HAVE_SERIAL, _SERIAL_ERR = False, str(e)
+
+try:
+    import fcntl, termios  # POSIX only
+except ImportError:
+    fcntl = termios = None
+
+_MAX_DRAIN = 1 << 20  # cap on a single in_waiting drain
+_READ_BUF = 64 << 10  # reusable readv/io_uring buffer; one tty read returns ~4 KiB at most
+_QUEUE_DEPTH = 256    # chunks buffered between the reader and writer threads
+_WRITEV_MAX = 32      # queued chunks coalesced into one write
+_ASYNC_LOW_LATENCY = 0x2000
+_FADVISE = hasattr(os, "posix_fadvise")
+_FADVISE_STEP = 16 << 20  # drop synced capture pages from the page cache every 16 MiB
+_MMAP_PREVIEW = 1 << 20   # previews above this are decoded from an mmap
+_HAVE_PREAD = hasattr(os, "pread")
+_O_BINARY = getattr(os, "O_BINARY", 0)  # Windows: no newline translation on raw fds
+_O_DSYNC = getattr(os, "O_DSYNC", 0)    # 0 where missing (Windows): "sync" fsyncs instead
+
+# Open ports kept between taps, keyed by line settings; a tap takes its port out while it runs.
+_PORT_POOL: Dict[tuple, "serial.Serial"] = {}
+_POOL_LOCK = threading.Lock()
+_POOL_MAX = 8
+
+Durability = Literal["none", "periodic", "sync"]
+Backend = Literal["default", "io_uring"]
+
+def _pick(table: tuple, i: int, default):
+    return table[i] if 0 <= i < len(table) and table[i] is not None else default
+
+def _set_low_latency(ser) -> None:
+    """Best effort: set ASYNC_LOW_LATENCY so USB-serial drivers (FTDI: 16 ms by default) hand
+    bytes over immediately instead of batching them on a latency timer. Linux only;
+    ports or platforms that do not support it are left alone."""
+    if not sys.platform.startswith("linux"):
+        return
+    setter = getattr(ser, "set_low_latency_mode", None)  # pyserial >= 3.5
+    if setter is not None:
+        try:
+            setter(True)
+        except Exception:
+            pass
+        return
+    if fcntl is None:
+        return
+    try:
+        buf = array.array("i", [0] * 32)  # struct serial_struct; flags is the 5th int
+        fcntl.ioctl(ser.fileno(), termios.TIOCGSERIAL, buf)
+        buf[4] |= _ASYNC_LOW_LATENCY
+        fcntl.ioctl(ser.fileno(), termios.TIOCSSERIAL, buf)
+    except Exception:
+        pass
+
+def _writev_all(fd: int, bufs: list) -> int:
+    total = sum(map(len, bufs))
+    if len(bufs) == 1 or not hasattr(os, "writev"):
+        for b in bufs:
+            _write_all(fd, b)
+        return total
+    n = os.writev(fd, bufs)
+    if n < total:
+        _write_all(fd, b"".join(bufs)[n:])
+    return total
+
+class _TapThreads:
+    """Reusable daemon threads for the capture loops. A loop occupies its thread for the
+    whole capture, so submit() never queues behind busy threads (it starts a new one when
+    none is idle), and finished threads park for the next tap, up to `max_idle` of them."""
+    def __init__(self, max_idle: int = 16):
+        self.max_idle = max_idle
+        self._jobs: "queue.SimpleQueue[tuple]" = queue.SimpleQueue()
+        self._idle = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[[], None]) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            spawn = self._idle == 0
+            if not spawn:
+                self._idle -= 1
+        self._jobs.put((fn, fut))
+        if spawn:
+            threading.Thread(target=self._work, name="UartTap", daemon=True).start()
+        return fut
+
+    def _work(self):
+        while True:
+            fn, fut = self._jobs.get()
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                fut.set_exception(e)
+            with self._lock:
+                if self._idle >= self.max_idle:
+                    return
+                self._idle += 1
+
+_THREADS = _TapThreads()
+
+@dataclass(frozen=True, **_SLOTS)
 class UartSpec:
     port: str                   # e.g., "/dev/ttyUSB0" or "COM3"
     baudrate: int = 115200
@@ -14,88 +128,354 @@ class UartSpec:
     encoding: str = "utf-8"
     linger: float = 0.5         # seconds to continue capturing after command ends
     max_preview: int = 2000     # bytes shown in preview
+    durability: Durability = "periodic"  # "none": never fsync; "periodic": fsync on the
+                                         # flush threshold; "sync": every write reaches
+                                         # disk (O_DSYNC, or an fsync where it is missing)
+    backend: Backend = "default"  # "io_uring": read via liburing (Linux), else falls back
+
+    def __post_init__(self):
+        if self.durability not in get_args(Durability):
+            raise ValueError(f"durability must be one of {get_args(Durability)}, "
+                             f"got {self.durability!r}")
+        if self.backend not in get_args(Backend):
+            raise ValueError(f"backend must be one of {get_args(Backend)}, got {self.backend!r}")
 
 class UartTap:
-    """Background UART capture to a file; optionally emits chunks to a callback."""
+    """Background UART capture to a file; optionally emits chunks to a callback.
+
+    A reader thread drains the port into a bounded queue; a writer thread appends to the
+    file and runs the callback. With the default durability ("periodic") the file is fsynced
+    once `flush_bytes` are pending or every `flush_interval` seconds, not per read.
+
+    on_chunk receives coalesced bytes: reads are batched until `callback_chunks` are pending
+    or `callback_interval` seconds have passed, and the remainder is delivered on stop."""
+    flush_bytes = 65536
+    flush_interval = 0.1
+    quiet_after = 0.05
+    callback_chunks = 16
+    callback_interval = 0.05
+
     def __init__(self, spec: UartSpec, outfile_path: pathlib.Path,
                  on_chunk: Optional[Callable[[bytes], None]] = None):
         self.spec = spec
         self.outfile_path = outfile_path
         self.stop_evt = threading.Event()
-        self.thread: Optional[threading.Thread] = None
+        self._future: Optional[Future] = None  # reader loop
         self.bytes_captured = 0
         self.error: Optional[str] = None
         self._ser = None  # type: ignore
         self._on_chunk = on_chunk
+        self._write_q: "queue.Queue[bytes|None]" = queue.Queue(maxsize=_QUEUE_DEPTH)
+        self._writer: Optional[Future] = None
+        self._buf: Optional[bytearray] = None  # allocated by start(), once the port is open
+        self._last_rx = time.monotonic()
+        self._stop_pipe: Optional[tuple] = None  # (r, w); wakes the reader out of select()
+
+    def _pool_key(self) -> tuple:
+        sp = self.spec
+        return (sp.port, sp.baudrate, sp.bytesize, sp.parity.upper(), sp.stopbits)
 
     def _open_serial(self):
-        try:
-            import serial  # pyserial
-        except Exception as e:
-            self.error = f"pyserial not available: {e}"
+        if not _HAVE_SERIAL:
+            self.error = f"pyserial not available: {_SERIAL_ERR}"
             return False
-
+        with _POOL_LOCK:
+            ser = _PORT_POOL.pop(self._pool_key(), None)
+        if ser is not None:
+            try:
+                # Same line settings as last time, so skip the reopen; drop whatever arrived
+                # between taps, as a fresh open would.
+                if ser.timeout != self.spec.read_timeout:
+                    ser.timeout = self.spec.read_timeout
+                ser.reset_input_buffer()
+                self._ser = ser
+                return True
+            except Exception:
+                try:
+                    ser.close()
+                except Exception:
+                    pass
         try:
-            from serial import EIGHTBITS, SEVENBITS, SIXBITS, FIVEBITS
-            from serial import PARITY_NONE, PARITY_EVEN, PARITY_ODD, PARITY_MARK, PARITY_SPACE
-            from serial import STOPBITS_ONE, STOPBITS_ONE_POINT_FIVE, STOPBITS_TWO
-
-            size_map = {8:EIGHTBITS,7:SEVENBITS,6:SIXBITS,5:FIVEBITS}
-            parity_map = {"N":PARITY_NONE,"E":PARITY_EVEN,"O":PARITY_ODD,"M":PARITY_MARK,"S":PARITY_SPACE}
-            stop_map = {1:STOPBITS_ONE,1.5:STOPBITS_ONE_POINT_FIVE,2:STOPBITS_TWO}
-
             self._ser = serial.Serial(
                 port=self.spec.port,
                 baudrate=self.spec.baudrate,
-                bytesize=size_map.get(self.spec.bytesize, EIGHTBITS),
-                parity=parity_map.get(self.spec.parity.upper(), PARITY_NONE),
-                stopbits=stop_map.get(self.spec.stopbits, STOPBITS_ONE),
+                bytesize=_pick(_SIZE, int(self.spec.bytesize), serial.EIGHTBITS),
+                parity=_PARITY.get(self.spec.parity.upper(), serial.PARITY_NONE),
+                stopbits=_pick(_STOP, int(self.spec.stopbits * 2), serial.STOPBITS_ONE),
                 timeout=self.spec.read_timeout
             )
+            _set_low_latency(self._ser)
             return True
         except Exception as e:
             self.error = f"open serial failed: {e}"
             return False
 
+    def _release_serial(self):
+        """Hand a healthy port back to the pool (bounded), otherwise close it."""
+        ser, self._ser = self._ser, None
+        if ser is None:
+            return
+        if self.error is None and ser.is_open:
+            with _POOL_LOCK:
+                key = self._pool_key()
+                if key not in _PORT_POOL and len(_PORT_POOL) < _POOL_MAX:
+                    _PORT_POOL[key] = ser
+                    return
+        try:
+            ser.close()
+        except Exception:
+            pass
+
+    @classmethod
+    def close_pool(cls):
+        """Close every port kept open between taps (e.g. at the end of a test session)."""
+        with _POOL_LOCK:
+            pooled = list(_PORT_POOL.values())
+            _PORT_POOL.clear()
+        for ser in pooled:
+            try:
+                ser.close()
+            except Exception:
+                pass
+
     def start(self) -> bool:
         if not self._open_serial():
             return False
-        self.thread = threading.Thread(target=self._loop, name="UartTap", daemon=True)
-        self.thread.start()
+        if self._buf is None:
+            self._buf = bytearray(_READ_BUF)
+        self._writer = _THREADS.submit(self._writer_loop)
+        if os.name == "posix":
+            self._stop_pipe = os.pipe()
+        self._future = _THREADS.submit(self._loop)
         return True
 
     def _loop(self):
+        # Reader: only talks to the port and hands chunks to the writer thread, so a slow
+        # disk or callback cannot stall the UART. The queue is bounded; when it fills, put()
+        # blocks and the driver buffer absorbs the backlog.
+        put = self._write_q.put
+        ser, stopped = self._ser, self.stop_evt.is_set
+        mv = memoryview(self._buf)
+        bufs = [mv]
+        readv, select_, monotonic = getattr(os, "readv", None), select.select, time.monotonic
+        try:
+            fd = ser.fileno() if readv else None  # type: ignore
+        except Exception:
+            fd = None
+        stop_r = self._stop_pipe[0] if self._stop_pipe else None
+        rlist = [fd, stop_r]
         try:
-            with open(self.outfile_path, "wb") as f:
-                while not self.stop_evt.is_set():
+            if (self.spec.backend == "io_uring" and liburing is not None and termios is not None
+                    and fd is not None and stop_r is not None):
+                try:
+                    if self._uring_loop(fd, stop_r):
+                        return
+                except Exception as e:
+                    self.error = f"read error: {e}"
+                    return
+            while not stopped():
+                try:
+                    if fd is not None and stop_r is not None:
+                        # Sleep until the port is readable or stop() pokes the pipe: no idle
+                        # wakeups, and shutdown does not wait out read_timeout.
+                        if stop_r in select_(rlist, [], [])[0]:
+                            break
+                        # Read everything queued straight into the reusable buffer; the writer
+                        # gets its own copy since _buf is refilled next pass.
+                        try:
+                            got = readv(fd, bufs)
+                        except BlockingIOError:
+                            continue
+                        if not got:
+                            raise OSError("device reports readiness to read but returned no data")
+                        data = bytes(mv[:got])
+                    else:
+                        # Drain whatever the driver has queued in one read; when it is empty,
+                        # block for the first byte (up to read_timeout).
+                        n = ser.in_waiting  # type: ignore
+                        data = ser.read(min(n, _MAX_DRAIN) if n else 1)  # type: ignore
+                    if data:
+                        self._last_rx = monotonic()
+                        put(data)
+                except Exception as e:
+                    self.error = f"read error: {e}"
+                    break
+        finally:
+            put(None)
+            self._release_serial()
+
+    def _uring_loop(self, fd: int, stop_r: int) -> bool:
+        """io_uring reader: one READ on the port stays in flight and is resubmitted as it
+        completes; completions are awaited with _uring_wait_cqe, which also watches the
+        stop pipe. Returns False if the ring cannot be set up or the kernel will not serve
+        the read (no IORING_OP_READ before 5.6, or -EAGAIN for a non-blocking fd), and the
+        caller carries on with the select() loop."""
+        try:
+            # pyserial leaves VMIN=0, so an empty tty read completes at once with 0 bytes;
+            # io_uring needs VMIN=1 to park the read until data arrives.
+            saved = termios.tcgetattr(fd)
+            attrs = termios.tcgetattr(fd)
+            attrs[6][termios.VMIN], attrs[6][termios.VTIME] = 1, 0
+            ring, cqe = liburing.Ring(), liburing.Cqe()
+            liburing.io_uring_queue_init(4, ring)
+        except Exception:
+            return False
+        termios.tcsetattr(fd, termios.TCSANOW, attrs)
+        put, buf, mv, monotonic = self._write_q.put, self._buf, memoryview(self._buf), time.monotonic
+
+        def read():
+            sqe = liburing.io_uring_get_sqe(ring)
+            liburing.io_uring_prep_read(sqe, fd, buf, len(buf), -1)
+            liburing.io_uring_submit(ring)
+
+        try:
+            read()
+            while _uring_wait_cqe(ring, cqe, stop_r):
+                c = cqe[0]
+                res = c.res
+                liburing.io_uring_cqe_seen(ring, c)
+                if res in (-errno.EINVAL, -errno.EAGAIN, -errno.EOPNOTSUPP):
+                    return False
+                if res == -errno.EINTR:
+                    read()
+                    continue
+                if res < 0:
+                    raise OSError(-res, os.strerror(-res))
+                if not res:
+                    raise OSError("device reports readiness to read but returned no data")
+                self._last_rx = monotonic()
+                put(bytes(mv[:res]))
+                read()
+            return True  # stop requested
+        finally:
+            liburing.io_uring_queue_exit(ring)  # cancels the read still in flight
+            try:
+                termios.tcsetattr(fd, termios.TCSANOW, saved)
+            except termios.error:
+                pass
+
+    def _writer_loop(self):
+        q = self._write_q
+        done = False  # reader's None sentinel consumed
+        try:
+            # Raw fd: chunks are already sized by the reader, so a userspace buffer only adds
+            # a copy. "Flushing" at the threshold therefore means fsync, per spec.durability.
+            durability = self.spec.durability
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_APPEND | _O_BINARY
+            if durability == "sync":
+                flags |= _O_DSYNC
+            sync_each = durability == "sync" and not _O_DSYNC
+            fd = os.open(self.outfile_path, flags, 0o644)
+            captured = 0  # published to bytes_captured on the flush threshold and at exit
+            try:
+                get, get_nowait, monotonic = q.get, q.get_nowait, time.monotonic
+                flush_bytes, flush_interval = self.flush_bytes, self.flush_interval
+                cb_chunks, cb_interval = self.callback_chunks, self.callback_interval
+                pending, last_sync, advised = 0, monotonic(), 0
+                on_chunk, cb_batch, last_cb = self._on_chunk, [], monotonic()
+                while not done:
                     try:
-                        data = self._ser.read(4096)  # type: ignore
-                        if data:
-                            f.write(data); f.flush()
-                            self.bytes_captured += len(data)
-                            if self._on_chunk:
-                                self._on_chunk(data)
-                    except Exception as e:
-                        self.error = f"read error: {e}"
+                        data = get(timeout=cb_interval if cb_batch else flush_interval)
+                    except queue.Empty:
+                        data = b""
+                    if data is None:
+                        done = True
                         break
-        finally:
+                    if data:
+                        # Coalesce whatever else is already queued into one writev.
+                        bufs = [data]
+                        while len(bufs) < _WRITEV_MAX:
+                            try:
+                                data = get_nowait()
+                            except queue.Empty:
+                                break
+                            if data is None:
+                                done = True
+                                break
+                            bufs.append(data)
+                        n = _writev_all(fd, bufs)
+                        if sync_each:
+                            try:
+                                os.fsync(fd)
+                            except OSError:
+                                pass
+                        pending += n
+                        captured += n
+                        if on_chunk:
+                            cb_batch += bufs
+                    if cb_batch and (len(cb_batch) >= cb_chunks
+                                     or monotonic() - last_cb >= cb_interval):
+                        on_chunk(b"".join(cb_batch))
+                        cb_batch, last_cb = [], monotonic()
+                    if pending and (pending >= flush_bytes
+                                    or monotonic() - last_sync >= flush_interval):
+                        self.bytes_captured = captured
+                        if durability != "none":
+                            try:
+                                if durability == "periodic":
+                                    os.fsync(fd)
+                                # Synced pages are clean: let the kernel drop them rather than
+                                # keep a long capture we never read back in the page cache.
+                                if _FADVISE and captured - advised >= _FADVISE_STEP:
+                                    os.posix_fadvise(fd, advised, captured - advised,
+                                                     os.POSIX_FADV_DONTNEED)
+                                    advised = captured
+                            except OSError:
+                                pass  # e.g. a pipe or char device as outfile
+                        pending, last_sync = 0, monotonic()
+                if cb_batch:
+                    on_chunk(b"".join(cb_batch))
+            finally:
+                self.bytes_captured = captured
+                os.close(fd)
+        except Exception as e:
+            self.error = f"write error: {e}"
+            self._signal_stop()
+            if not done:
+                for _ in iter(q.get, None):  # keep the reader from blocking on a full queue
+                    pass
+
+    def _signal_stop(self):
+        self.stop_evt.set()
+        if self._stop_pipe:
             try:
-                if self._ser:
-                    self._ser.close()
-            except Exception:
+                os.write(self._stop_pipe[1], b"x")
+            except OSError:
                 pass
 
     def stop(self, linger: float = 0.0):
-        if linger > 0:
-            time.sleep(linger)
-        self.stop_evt.set()
-        if self.thread:
-            self.thread.join(timeout=2.0)
+        """Stop capturing. `linger` is an upper bound: capture keeps going while bytes are
+        still arriving, but ends as soon as the port has been quiet for `quiet_after` s."""
+        deadline = time.monotonic() + linger
+        while not self.stop_evt.is_set():
+            now = time.monotonic()
+            if now >= deadline or now - self._last_rx > self.quiet_after:
+                break
+            self.stop_evt.wait(0.01)
+        self._signal_stop()
+        if self._future:
+            futures.wait((self._future,), timeout=2.0)
+        if self._writer:
+            futures.wait((self._writer,), timeout=2.0)
+        if self._stop_pipe and not (self._future and not self._future.done()):
+            for pfd in self._stop_pipe:
+                os.close(pfd)
+            self._stop_pipe = None
 
     def preview_text(self, max_bytes: int, encoding: str) -> str|None:
         try:
-            with open(self.outfile_path, "rb") as f:
-                data = f.read(max_bytes)
-            return data.decode(encoding=encoding, errors="replace")
+            fd = os.open(self.outfile_path, os.O_RDONLY | _O_BINARY)
+            try:
+                if max_bytes > _MMAP_PREVIEW:
+                    # Large previews decode straight out of a read-only mapping, no copy.
+                    size = min(os.fstat(fd).st_size, max_bytes)
+                    if size:
+                        with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mm:
+                            return str(mm, encoding, "replace")
+                    return ""
+                data = os.pread(fd, max_bytes, 0) if _HAVE_PREAD else os.read(fd, max_bytes)
+                return data.decode(encoding, errors="replace")
+            finally:
+                os.close(fd)
         except Exception:
             return None
@@ -0,0 +1,37 @@
+import json, os, stat
+
+from diagfw import model
+from diagfw import DUT, run_iperf_mesh
+
+_FAKE_IPERF3 = """#!/bin/sh
+case " $* " in
+  *" --version "*) echo "iperf 3.fake" ;;
+  *" -s "*) echo '{"end":{"server":true}}' ;;
+  *) echo '{"end":{"client":true}}' ;;
+esac
+"""
+
+def test_mesh_reports_stable_client_artifact_and_cleans_up(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "iperf3"
+    fake.write_text(_FAKE_IPERF3)
+    fake.chmod(fake.stat().st_mode | stat.S_IXUSR)
+    path = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+    monkeypatch.setenv("PATH", path)  # the server side inherits the environment
+    cmd = model.TestSpec.cmd  # the client runs with the spec's env, which is empty by default
+    monkeypatch.setattr(model.TestSpec, "cmd",
+                        lambda self, c, **kw: cmd(self, c, **{**kw, "env": {"PATH": path}}))
+    monkeypatch.chdir(tmp_path)
+
+    # Local DUTs share this cwd, the case where one client file per pair matters.
+    duts = [DUT(host=f"local{i}", meta={"ip": "127.0.0.1"}) for i in range(3)]
+    results = run_iperf_mesh(duts, duration=1)
+
+    assert len(results) == 3
+    for res in results:
+        meta = res.artifacts["iperf_client.json"]
+        assert meta["exists"]
+        assert json.loads(meta["preview"]) == {"end": {"client": True}}
+        assert (tmp_path / res.stdout_path).with_name("iperf_client.json").exists()
+    assert not list(tmp_path.glob("iperf_client*.json"))
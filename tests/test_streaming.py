@@ -0,0 +1,170 @@
+import json, socket, time
+from datetime import datetime
+
+import pytest
+
+from diagfw import streaming
+from diagfw.streaming import TCPSink
+
+def _listener():
+    srv = socket.socket()
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(1)
+    return srv, srv.getsockname()[1]
+
+def _recv_until(conn, n: int, timeout: float = 2.0) -> bytes:
+    conn.settimeout(timeout)
+    data = b""
+    while len(data) < n:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+def test_tcpsink_lone_record_sent_after_batch_interval():
+    srv, port = _listener()
+    sink = TCPSink(port=port, batch_interval=0.05)
+    try:
+        t0 = time.monotonic()
+        sink.send_raw(b'{"a":1}\n')
+        conn, _ = srv.accept()
+        assert _recv_until(conn, 8) == b'{"a":1}\n'
+        assert time.monotonic() - t0 < 0.5
+        conn.close()
+    finally:
+        sink.close()
+        srv.close()
+
+def test_tcpsink_holds_small_records_until_flush():
+    srv, port = _listener()
+    sink = TCPSink(port=port, batch_interval=30)
+    try:
+        sink.send_raw(b"a\n")
+        sink.send_raw(b"b\n")
+        srv.settimeout(0.2)
+        with pytest.raises(socket.timeout):
+            srv.accept()  # nothing flushed yet, so the sink has not even connected
+        sink.flush()
+        srv.settimeout(None)
+        conn, _ = srv.accept()
+        assert _recv_until(conn, 4) == b"a\nb\n"
+        conn.close()
+    finally:
+        sink.close()
+        srv.close()
+
+def test_tcpsink_close_flushes_pending():
+    srv, port = _listener()
+    sink = TCPSink(port=port, batch_interval=30)
+    sink.send_raw(b"tail\n")
+    sink.close()
+    try:
+        conn, _ = srv.accept()
+        assert _recv_until(conn, 6) == b"tail\n"
+        conn.close()
+    finally:
+        srv.close()
+
+class _TrickleSocket:
+    """sendmsg() that takes at most `limit` bytes per call, like a full socket buffer."""
+    def __init__(self, limit: int):
+        self.limit, self.calls, self.data = limit, [], b""
+    def sendmsg(self, bufs):
+        self.calls.append(len(bufs))
+        taken = b"".join(bytes(b) for b in bufs)[:self.limit]
+        self.data += taken
+        return len(taken)
+    def close(self):
+        pass
+
+def test_tcpsink_sends_batch_at_batch_bytes_in_one_sendmsg():
+    sink = TCPSink(batch_bytes=8, batch_interval=30)
+    sink.sock = fake = _TrickleSocket(limit=1 << 20)
+    sink.send_raw(b"1234\n")
+    assert fake.calls == []
+    sink.send_raw(b"5678\n")  # crosses batch_bytes: goes out without waiting
+    assert fake.calls == [2] and fake.data == b"1234\n5678\n"
+    sink.close()
+
+def test_tcpsink_resumes_partial_sendmsg():
+    sink = TCPSink(batch_interval=30)
+    sink.sock = fake = _TrickleSocket(limit=3)
+    records = [b"alpha\n", b"b\n", b"charlie\n"]
+    for rec in records:
+        sink.send_raw(rec)
+    sink.flush()
+    assert fake.data == b"".join(records)
+    assert len(fake.calls) > 1
+    sink.close()
+
+@pytest.mark.parametrize("io_uring", [False, True])
+def test_collector_writes_records_while_connection_open(tmp_path, monkeypatch, io_uring):
+    if io_uring:
+        ring = streaming._open_uring()
+        if ring is None:
+            pytest.skip("io_uring not available")
+        ring.close()
+    monkeypatch.chdir(tmp_path)
+    srv = streaming.serve_streams("127.0.0.1", 0, use_io_uring=io_uring)
+    try:
+        with socket.create_connection(srv.server_address) as c:
+            c.sendall(b'{"run_id":"r","test":"t","stream_id":"s1","source":"stdout","text":"hi\\n"}\n')
+            log = tmp_path / "streams" / "r" / "t" / "stdout.log"
+            raw = tmp_path / "streams" / "r" / "t" / "s1_stdout.ndjson"
+            deadline = time.monotonic() + 2
+            while time.monotonic() < deadline and not (log.exists() and log.stat().st_size):
+                time.sleep(0.01)
+            assert log.read_bytes() == b"hi\n"
+            assert raw.read_bytes().endswith(b'"text":"hi\\n"}\n')
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+def test_streammux_skips_discarding_sink():
+    class Discard(streaming.NullSink):
+        def send(self, rec):
+            raise AssertionError("record built for a discarding sink")
+        send_raw = send
+    mux = streaming.StreamMux(Discard(), "r", "t", None)
+    mux.emit_text("stdout", "x")
+    mux.emit_blob("uart", b"x")
+    mux.emit_chunked("stdout", "x" * 10)
+    assert mux._seq == 0
+
+class _RawSink(streaming.StreamSink):
+    def __init__(self):
+        self.lines = []
+    def send_raw(self, data: bytes):
+        self.lines.append(data)
+
+class _DictSink(streaming.StreamSink):
+    def __init__(self):
+        self.recs = []
+    def send(self, rec: dict):
+        self.recs.append(rec)
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_streammux_raw_records_match_dict_path(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(streaming, "orjson", None)
+    elif streaming.orjson is None:
+        pytest.skip("orjson not installed")
+    dut = type("D", (), {"host": 'h"ost\\'})()
+    raw, dct = _RawSink(), _DictSink()
+    muxes = [streaming.StreamMux(s, 'run "1"', "tést", dut) for s in (raw, dct)]
+    for mux in muxes:
+        mux.emit_text("stdout", 'quote " backslash \\ tab\t nl\n ctrl\x01 ☃ \U0001F600')
+        mux.emit_text("stderr", "", meta={"k": [1, "v"], "n": None})
+        mux.emit_blob("uart", b"\x00\xff binary")
+        mux.emit_chunked("artifact:x.json", "abc" * 5, chunk=4)
+    assert all(line.endswith(b"}\n") and line.count(b"\n") == 1 for line in raw.lines)
+    got = [json.loads(line) for line in raw.lines]
+    assert len(got) == len(dct.recs)
+    for r, d in zip(got, dct.recs):
+        assert datetime.fromisoformat(r.pop("ts")) and datetime.fromisoformat(d.pop("ts"))
+        r.pop("stream_id"), d.pop("stream_id")  # random per mux
+        assert r == d
+    sids = {}
+    for rec in (json.loads(line) for line in raw.lines):
+        assert sids.setdefault(rec["source"], rec["stream_id"]) == rec["stream_id"]
@@ -0,0 +1,76 @@
+import asyncio, time
+
+import pytest
+
+from diagfw import transport
+from diagfw.transport import LocalTransport
+
+def _stream(cmd: str, on_stdout=None, **kw):
+    out, err = [], []
+    rc = LocalTransport().stream(cmd, on_stdout=on_stdout or out.append,
+                                 on_stderr=err.append, **kw)
+    return rc, out, err
+
+def _stream_async(cmd: str, on_stdout=None, **kw):
+    out, err = [], []
+    rc = asyncio.run(LocalTransport().stream_async(cmd, on_stdout=on_stdout or out.append,
+                                                   on_stderr=err.append, **kw))
+    return rc, out, err
+
+@pytest.fixture(params=["sync", "async", "threaded"])
+def stream(request, monkeypatch):
+    if request.param == "threaded":  # the non-POSIX fallback, exercised here too
+        monkeypatch.setattr(transport, "_pump_lines", transport._pump_lines_threaded)
+    return _stream_async if request.param == "async" else _stream
+
+def test_stream_delivers_lines_and_rc(stream):
+    rc, out, err = stream("echo a; echo b >&2; exit 3")
+    assert (rc, out, err) == (3, ["a\n"], ["b\n"])
+
+def test_stream_partial_last_line(stream):
+    rc, out, _ = stream("printf 'one\\ntwo'")
+    assert rc == 0
+    assert out == ["one\n", "two"]
+
+def test_stream_timeout_returns_124(stream):
+    t0 = time.monotonic()
+    rc, out, _ = stream("echo started; sleep 10", timeout=1)
+    assert rc == 124
+    assert out == ["started\n"]
+    assert time.monotonic() - t0 < 5
+
+def test_stream_timeout_under_output_flood(stream):
+    seen = [0]
+    def slow_cb(line):
+        seen[0] += 1
+        if seen[0] % 1000 == 0:
+            time.sleep(0.001)
+    t0 = time.monotonic()
+    rc, _, _ = stream("yes", timeout=1, on_stdout=slow_cb)
+    assert rc == 124
+    assert time.monotonic() - t0 < 3
+
+# Not for the threaded fallback: its reader thread would keep draining the orphaned `yes`.
+@pytest.mark.parametrize("stream", [_stream, _stream_async])
+def test_stream_flood_does_not_starve_stderr(stream):
+    t0 = time.monotonic()
+    rc, _, err = stream("(yes &); sleep 0.1; echo err >&2; sleep 30", timeout=2)
+    assert rc == 124
+    assert err == ["err\n"]
+    assert time.monotonic() - t0 < 5
+
+def test_stream_background_child_holding_pipes(stream):
+    t0 = time.monotonic()
+    rc, out, _ = stream("sleep 5 & echo done")
+    assert rc == 0
+    assert out == ["done\n"]
+    assert time.monotonic() - t0 < 3
+
+def test_stream_passes_stdin(stream):
+    rc, out, _ = stream("cat", stdin="x\ny\n")
+    assert rc == 0
+    assert "".join(out) == "x\ny\n"
+
+def test_run_captures_output_and_stdin():
+    res = LocalTransport().run("cat; echo e >&2", stdin="in\n")
+    assert (res.rc, res.stdout, res.stderr) == (0, "in\n", "e\n")
@@ -0,0 +1,186 @@
+import os, threading, time
+
+import pytest
+
+from diagfw import uart
+from diagfw.uart import UartSpec, UartTap
+
+pty = pytest.importorskip("pty")
+tty = pytest.importorskip("tty")
+needs_serial = pytest.mark.skipif(not uart._HAVE_SERIAL, reason="pyserial not available")
+
+@pytest.fixture
+def port():
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    try:
+        yield master, os.ttyname(slave)
+    finally:
+        UartTap.close_pool()
+        os.close(master)
+        os.close(slave)
+
+@pytest.mark.parametrize("field, value", [("durability", "fsync"), ("backend", "iouring")])
+def test_uartspec_rejects_unknown_modes(field, value):
+    with pytest.raises(ValueError, match=field):
+        UartSpec(port="/dev/null", **{field: value})
+
+@needs_serial
+def test_uarttap_sync_without_o_dsync_fsyncs_each_write(port, tmp_path, monkeypatch):
+    master, name = port
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(uart, "_O_DSYNC", 0)
+    monkeypatch.setattr(uart.os, "fsync", lambda fd: (synced.append(fd), real_fsync(fd)))
+    out = tmp_path / "uart.log"
+    tap = UartTap(UartSpec(port=name, durability="sync"), out)
+    tap.flush_interval = 60  # so only the per-write fsync can fire
+    assert tap.start(), tap.error
+    os.write(master, b"durable\n")
+    deadline = time.monotonic() + 2
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    tap.stop(linger=0.5)
+    assert synced
+    assert out.read_bytes() == b"durable\n"
+
+def test_uarttap_allocates_read_buffer_only_when_started(tmp_path):
+    tap = UartTap(UartSpec(port=str(tmp_path / "no-such-tty")), tmp_path / "uart.log")
+    tap.start()
+    assert tap._buf is None
+
+@needs_serial
+def test_uarttap_captures_to_file_and_callback(port, tmp_path):
+    master, name = port
+    out = tmp_path / "uart.log"
+    chunks = []
+    tap = UartTap(UartSpec(port=name), out, on_chunk=chunks.append)
+    assert tap.start(), tap.error
+    payload = b"".join(b"line %04d\n" % i for i in range(500))
+    for i in range(0, len(payload), 512):
+        os.write(master, payload[i:i + 512])
+    tap.stop(linger=1.0)
+    assert tap.error is None
+    assert out.read_bytes() == payload
+    assert b"".join(chunks) == payload
+    assert tap.preview_text(9, "utf-8") == "line 0000"
+
+@needs_serial
+def test_uarttap_slow_callback_does_not_lose_data(port, tmp_path):
+    master, name = port
+    out = tmp_path / "uart.log"
+    chunks = []
+    def slow(chunk):
+        chunks.append(chunk)
+        time.sleep(0.05)  # writer thread stalls; the reader keeps draining the port
+    tap = UartTap(UartSpec(port=name), out, on_chunk=slow)
+    assert tap.start(), tap.error
+    payload = os.urandom(64 << 10)
+    for i in range(0, len(payload), 1024):
+        os.write(master, payload[i:i + 1024])
+    tap.stop(linger=2.0)
+    assert tap.error is None
+    assert out.read_bytes() == payload
+    assert b"".join(chunks) == payload
+
+@needs_serial
+def test_uarttap_wakes_on_data_and_stop_not_read_timeout(port, tmp_path):
+    master, name = port
+    got = []
+    tap = UartTap(UartSpec(port=name, read_timeout=5.0), tmp_path / "uart.log",
+                  on_chunk=got.append)
+    assert tap.start(), tap.error
+    time.sleep(0.2)  # reader is idle in select()
+    t0 = time.monotonic()
+    os.write(master, b"ping\n")
+    while not got and time.monotonic() - t0 < 2:
+        time.sleep(0.005)
+    assert got == [b"ping\n"]
+    assert time.monotonic() - t0 < 0.5
+    t0 = time.monotonic()
+    tap.stop()
+    assert time.monotonic() - t0 < 0.5  # the stop pipe wakes select(); no read_timeout wait
+    assert tap._future.done()
+
+@needs_serial
+def test_uarttap_stop_ends_capture(port, tmp_path):
+    master, name = port
+    out = tmp_path / "uart.log"
+    tap = UartTap(UartSpec(port=name), out)
+    assert tap.start(), tap.error
+    os.write(master, b"before\n")
+    time.sleep(0.2)
+    t0 = time.monotonic()
+    tap.stop(linger=5.0)
+    assert time.monotonic() - t0 < 1.0  # port went quiet, so linger is cut short
+    assert tap._future.done() and tap._writer.done()
+    os.write(master, b"after\n")
+    time.sleep(0.1)
+    assert out.read_bytes() == b"before\n"
+
+@needs_serial
+def test_uarttap_linger_keeps_capturing_while_data_arrives(port, tmp_path):
+    master, name = port
+    out = tmp_path / "uart.log"
+    tap = UartTap(UartSpec(port=name), out)
+    assert tap.start(), tap.error
+    def trickle():
+        for i in range(10):
+            os.write(master, b"tick %d\n" % i)
+            time.sleep(0.01)  # well inside quiet_after
+    writer = threading.Thread(target=trickle)
+    writer.start()
+    tap.stop(linger=2.0)
+    writer.join()
+    assert out.read_bytes() == b"".join(b"tick %d\n" % i for i in range(10))
+
+@needs_serial
+def test_uarttap_reuses_pooled_port(port, tmp_path):
+    master, name = port
+    spec = UartSpec(port=name)
+    first = UartTap(spec, tmp_path / "a.log")
+    assert first.start(), first.error
+    ser = first._ser
+    first.stop()
+    key = first._pool_key()
+    assert uart._PORT_POOL[key] is ser and ser.is_open
+
+    os.write(master, b"stale\n")  # arrives between taps: dropped, as a fresh open would
+    time.sleep(0.05)
+    second = UartTap(UartSpec(port=name, read_timeout=0.2), tmp_path / "b.log")
+    assert second.start(), second.error
+    assert second._ser is ser and key not in uart._PORT_POOL  # taken out while running
+    assert ser.timeout == 0.2
+    os.write(master, b"fresh\n")
+    second.stop(linger=1.0)
+    assert (tmp_path / "b.log").read_bytes() == b"fresh\n"
+
+    other = UartTap(UartSpec(port=name, baudrate=9600), tmp_path / "c.log")
+    assert other.start(), other.error
+    assert other._ser is not ser  # different line settings: opened afresh
+    other.stop()
+
+    UartTap.close_pool()
+    assert not uart._PORT_POOL and not ser.is_open
+
+@needs_serial
+def test_uarttap_open_failure_sets_error(tmp_path):
+    tap = UartTap(UartSpec(port=str(tmp_path / "no-such-tty")), tmp_path / "uart.log")
+    assert not tap.start()
+    assert tap.error and tap.error.startswith("open serial failed")
+    assert not uart._PORT_POOL
+
+@needs_serial
+def test_uarttap_bytes_captured(port, tmp_path):
+    master, name = port
+    tap = UartTap(UartSpec(port=name), tmp_path / "uart.log")
+    tap.flush_bytes = 1024
+    assert tap.start(), tap.error
+    os.write(master, b"x" * 4096)
+    deadline = time.monotonic() + 2
+    while not tap.bytes_captured and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert 0 < tap.bytes_captured <= 4096  # published at the flush threshold, mid-capture
+    os.write(master, b"y" * 100)
+    tap.stop(linger=1.0)
+    assert tap.bytes_captured == 4196